@@ -4,6 +4,10 @@ from pacai.agents.base import BaseAgent
 from pacai.core import distanceCalculator
 from pacai.util import util
 
+# The most time (in seconds) to spend on maze distances in registerInitialState().
+# Whatever is left is computed a little at a time in each turn (see timeForComputing).
+STARTUP_TIME_FOR_COMPUTING = 5.0
+
 class CaptureAgent(BaseAgent):
     """
     A base class for capture agents.
@@ -28,7 +32,8 @@ class CaptureAgent(BaseAgent):
         # A history of observations
         self.observationHistory = []
 
-        # Time to spend each turn on computing maze distances
+        # Time to spend each turn on computing maze distances (until they are done).
+        # Until then, distances that are not computed yet are Manhattan distances.
         self.timeForComputing = timeForComputing
 
     def registerInitialState(self, gameState):
@@ -40,7 +45,7 @@ class CaptureAgent(BaseAgent):
         self.red = gameState.isOnRedTeam(self.index)
         self.distancer = distanceCalculator.Distancer(gameState.getInitialLayout())
 
-        self.distancer.getMazeDistances()
+        self.distancer.computeMazeDistances(STARTUP_TIME_FOR_COMPUTING)
 
     def final(self, gameState):
         self.observationHistory = []
@@ -64,6 +69,9 @@ class CaptureAgent(BaseAgent):
 
         self.observationHistory.append(gameState)
 
+        if (not self.distancer.isReadyForMazeDistance()):
+            self.distancer.computeMazeDistances(self.timeForComputing)
+
         myState = gameState.getAgentState(self.index)
         myPos = myState.getPosition()
 
@@ -95,6 +103,18 @@ class CaptureAgent(BaseAgent):
         else:
             return gameState.getRedFood()
 
+    def getFoodPositions(self, gameState):
+        """
+        Returns a list of the positions (x, y) of the food you're meant to eat.
+        This is the same food as `CaptureAgent.getFood`, but without scanning a grid.
+        The caller should not modify the list.
+        """
+
+        if (self.red):
+            return gameState.getBlueFoodPositions()
+        else:
+            return gameState.getRedFoodPositions()
+
     def getFoodYouAreDefending(self, gameState):
         """
         Returns the food you're meant to protect (i.e., that your opponent is supposed to eat).
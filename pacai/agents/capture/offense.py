@@ -1,4 +1,6 @@
 from pacai.agents.capture.reflex import ReflexCaptureAgent
+from pacai.core.distanceField import DistanceField
+from pacai.util.util import nearestPoint
 
 class OffensiveReflexAgent(ReflexCaptureAgent):
     """
@@ -10,19 +12,68 @@ class OffensiveReflexAgent(ReflexCaptureAgent):
     def __init__(self, index, **kwargs):
         super().__init__(index)
 
+        # The distance to the nearest food (that we can eat) from every cell,
+        # and the food it was last updated with.
+        self.foodField = None
+        self.foodPositions = None
+
+    def registerInitialState(self, gameState):
+        super().registerInitialState(gameState)
+
+        self.foodPositions = self.getFoodPositions(gameState)
+        self.foodField = DistanceField(gameState.getInitialLayout(), self.foodPositions)
+
+    def chooseAction(self, gameState):
+        self.updateFoodField(gameState)
+        return super().chooseAction(gameState)
+
+    def updateFoodField(self, gameState):
+        """
+        Remove any food that was eaten since the last update from the food field.
+        """
+
+        foodPositions = self.getFoodPositions(gameState)
+
+        # The list is only replaced when food is eaten.
+        if (foodPositions is self.foodPositions):
+            return
+
+        remaining = set(foodPositions)
+        for position in self.foodPositions:
+            if (position not in remaining):
+                self.foodField.removeTarget(position)
+
+        self.foodPositions = foodPositions
+
+    def getFoodDistance(self, gameState, successor, position):
+        """
+        Get the distance from a position to the nearest food that is left in the successor.
+        The food field is up to date with the current state,
+        so food that the successor just ate is taken out for the lookup.
+        """
+
+        x, y = nearestPoint(position)
+        if (not gameState.hasFood(x, y) or successor.hasFood(x, y)):
+            return self.foodField.getDistance(position)
+
+        self.foodField.removeTarget((x, y))
+        distance = self.foodField.getDistance(position)
+        self.foodField.addTarget((x, y))
+
+        return distance
+
     def getFeatures(self, gameState, action):
         features = {}
         successor = self.getSuccessor(gameState, action)
         features['successorScore'] = self.getScore(successor)
 
         # Compute distance to the nearest food.
-        foodList = self.getFood(successor).asList()
+        foodList = self.getFoodPositions(successor)
 
         # This should always be True, but better safe than sorry.
         if (len(foodList) > 0):
             myPos = successor.getAgentState(self.index).getPosition()
-            minDistance = min([self.getMazeDistance(myPos, food) for food in foodList])
-            features['distanceToFood'] = minDistance
+            features['distanceToFood'] = self.getFoodDistance(gameState, successor, myPos)
 
         return features
 
@@ -0,0 +1,104 @@
+from pacai.agents.ghost.base import GhostAgent
+from pacai.core import distanceCalculator
+from pacai.core import routing
+from pacai.core.actions import Actions
+from pacai.util import probability
+
+class MazeGhost(GhostAgent):
+    """
+    A ghost that rushes Pacman (or flees when scared) along the maze, instead of as the crow flies.
+
+    Chasing follows the layout's shared `pacai.core.routing.NextHopTable`,
+    so each move is a single lookup.
+    """
+
+    def __init__(self, index, prob_attack = 0.8, prob_scaredFlee = 0.8, **kwargs):
+        super().__init__(index, **kwargs)
+
+        self.prob_attack = prob_attack
+        self.prob_scaredFlee = prob_scaredFlee
+
+    def getDistribution(self, state):
+        # Read variables from state.
+        ghostState = state.getGhostState(self.index)
+        legalActions = state.getLegalActions(self.index)
+        pos = state.getGhostPosition(self.index)
+        isScared = ghostState.isScared()
+        pacmanPosition = state.getPacmanPosition()
+
+        if (len(legalActions) == 0):
+            return {}
+
+        layout = state.getInitialLayout()
+
+        bestActions = []
+        if (not isScared and distanceCalculator.isInt(pos)
+                and distanceCalculator.isInt(pacmanPosition)):
+            hop = routing.getSharedNextHops(layout).nextHop(pos, pacmanPosition)
+            if (hop in legalActions):
+                bestActions = [hop]
+
+        if (len(bestActions) == 0):
+            bestActions = self._getBestActions(layout, pos, legalActions, pacmanPosition, isScared)
+
+        bestProb = self.prob_attack
+        if (isScared):
+            bestProb = self.prob_scaredFlee
+
+        # Construct distribution.
+        dist = {}
+
+        for action in bestActions:
+            dist[action] = float(bestProb) / len(bestActions)
+
+        for action in legalActions:
+            if (action not in dist):
+                dist[action] = 0
+            dist[action] += float(1 - bestProb) / len(legalActions)
+
+        probability.normalize(dist)
+        return dist
+
+    def _getBestActions(self, layout, pos, legalActions, pacmanPosition, isScared):
+        """
+        Score each legal action by the maze distance to Pacman from where it leads.
+        This covers the moves that the next hop can not (e.g. fleeing or in between cells).
+        """
+
+        speed = 1
+        if (isScared):
+            speed = 0.5
+
+        distances = distanceCalculator.getSharedDistances(layout)
+
+        actionVectors = [Actions.directionToVector(action, speed) for action in legalActions]
+        newPositions = [(pos[0] + action[0], pos[1] + action[1]) for action in actionVectors]
+        distancesToPacman = [_getSnappedDistance(distances, newPosition, pacmanPosition)
+                for newPosition in newPositions]
+
+        if (isScared):
+            bestScore = max(distancesToPacman)
+        else:
+            bestScore = min(distancesToPacman)
+
+        zipActions = zip(legalActions, distancesToPacman)
+        return [action for action, distance in zipActions if distance == bestScore]
+
+def _getSnappedDistance(distances, pos1, pos2):
+    """
+    The maze distance between two positions that may be in between cells.
+    """
+
+    bestDistance = distanceCalculator.UNREACHABLE_DISTANCE
+
+    for pos1Snap, snap1Distance in distanceCalculator.getGrids2D(pos1):
+        for pos2Snap, snap2Distance in distanceCalculator.getGrids2D(pos2):
+            gridDistance = distances.getDistance(pos1Snap, pos2Snap)
+            if (gridDistance is None):
+                continue
+
+            distance = gridDistance + snap1Distance + snap2Distance
+            if (distance < bestDistance):
+                bestDistance = distance
+
+    return bestDistance
@@ -96,21 +96,30 @@ class SearchAgent(BaseAgent):
         Get the specified search function by name.
         If that function also takes a heurisitc (i.e. has a parameter called "heuristic"),
         then return a lambda that binds the heuristic to the function.
+        Any other agent arguments that the function takes (e.g. `maxNodes`) are bound as well.
         """
 
         # Locate the function.
         function = reflection.qualifiedImport(functionName)
 
+        # Find any agent arguments meant for the function.
+        parameters = function.__code__.co_varnames[:function.__code__.co_argcount]
+        searchArgs = {name: value for (name, value) in self.kwargs.items() if (name in parameters)}
+
         # Check if the function has a heuristic.
         if 'heuristic' not in function.__code__.co_varnames:
             logging.info('[SearchAgent] using function %s.' % (functionName))
-            return function
+        else:
+            if isinstance(heuristic, str):
+                # Fetch the heuristic.
+                heuristic = reflection.qualifiedImport(heuristic)
+            logging.info('[SearchAgent] using function %s and heuristic %s.' %
+                    (functionName, heuristic))
 
-        if isinstance(heuristic, str):
-            # Fetch the heuristic.
-            heuristic = reflection.qualifiedImport(heuristic)
-        logging.info('[SearchAgent] using function %s and heuristic %s.' %
-                (functionName, heuristic))
+            searchArgs['heuristic'] = heuristic
+
+        if (len(searchArgs) == 0):
+            return function
 
-        # Bind the heuristic.
-        return lambda x: function(x, heuristic = heuristic)
+        # Bind the arguments.
+        return lambda x: function(x, **searchArgs)
@@ -1,19 +1,182 @@
+import collections
+
 from pacai.agents.base import BaseAgent
+from pacai.core.gamestate import AbstractGameState
 from pacai.util import reflection
 
+DEFAULT_TABLE_SIZE = 100000
+
 class MultiAgentSearchAgent(BaseAgent):
     """
     A common class for all multi-agent searchers.
+
+    Each agent keeps a `TranspositionTable` for its whole game,
+    so searches can reuse the results of earlier turns.
+    The size of the table can be set with the `tableSize` agent argument.
     """
 
-    def __init__(self, index, evalFn = 'pacai.core.eval.score', depth = 2, **kwargs):
+    def __init__(self, index, evalFn = 'pacai.core.eval.score', depth = 2,
+            tableSize = DEFAULT_TABLE_SIZE, **kwargs):
         super().__init__(index, **kwargs)
 
         self._evaluationFunction = reflection.qualifiedImport(evalFn)
         self._treeDepth = int(depth)
+        self._transpositionTable = TranspositionTable(int(tableSize))
+
+    def evaluate(self, state):
+        """
+        Get the value of the evaluation function for a state.
+        Values are memoized, so evaluating the same (equal) state again is just a lookup.
+        """
+
+        value = self._transpositionTable.getEvaluation(state)
+        if (value is None):
+            value = self._evaluationFunction(state)
+            self._transpositionTable.putEvaluation(state, value)
+
+        return value
 
     def getEvaluationFunction(self):
         return self._evaluationFunction
 
+    def getTranspositionTable(self):
+        return self._transpositionTable
+
     def getTreeDepth(self):
         return self._treeDepth
+
+class TableEntry(object):
+    """
+    The stored result of searching a single node.
+    """
+
+    __slots__ = ('value', 'bound', 'action', 'check')
+
+    def __init__(self, value, bound, action, check = None):
+        self.value = value
+        self.bound = bound
+        self.action = action
+
+        # The verification hash of the state, see `TranspositionTable`.
+        self.check = check
+
+    def isCutoff(self, alpha = float('-inf'), beta = float('inf')):
+        """
+        Check if this entry's value can be used as the node's value,
+        given the current alpha-beta window.
+        """
+
+        if (self.bound == TranspositionTable.EXACT):
+            return True
+
+        if (self.bound == TranspositionTable.LOWER_BOUND):
+            return self.value >= beta
+
+        return self.value <= alpha
+
+class TranspositionTable(object):
+    """
+    A bounded table of search results for game states.
+    It works for minimax, alpha-beta, and expectimax searches.
+
+    Entries are keyed on the hash of the state, the remaining depth,
+    and the index of the agent to move.
+    Each entry stores a value, the kind of bound that the value is, and the best action found.
+    Leaf evaluations are memoized separately by the hash of the state.
+
+    States themselves are not kept (so they can be freed).
+    Instead, each entry also stores a second hash of its state that is computed differently,
+    and entries whose second hash does not match are treated as misses.
+
+    Both tables hold at most `maxSize` entries,
+    and the least recently used entries are replaced first.
+    """
+
+    # The stored value is the exact value of the node.
+    EXACT = 0
+    # The search failed high, the true value is at least the stored value.
+    LOWER_BOUND = 1
+    # The search failed low, the true value is at most the stored value.
+    UPPER_BOUND = 2
+
+    def __init__(self, maxSize = DEFAULT_TABLE_SIZE):
+        self._maxSize = maxSize
+        self._entries = collections.OrderedDict()
+        self._evaluations = collections.OrderedDict()
+
+    @staticmethod
+    def boundFor(value, alpha, beta):
+        """
+        Get the kind of bound that a value found with the given (original) alpha-beta window is.
+        """
+
+        if (value <= alpha):
+            return TranspositionTable.UPPER_BOUND
+
+        if (value >= beta):
+            return TranspositionTable.LOWER_BOUND
+
+        return TranspositionTable.EXACT
+
+    def clear(self):
+        self._entries.clear()
+        self._evaluations.clear()
+
+    def get(self, state, depth, agentIndex):
+        """
+        Get the `TableEntry` for a node, or None if the node has not been stored.
+        """
+
+        entry = self._get(self._entries, (hash(state), depth, agentIndex))
+        if (entry is None or entry.check != _verificationHash(state)):
+            return None
+
+        return entry
+
+    def getEvaluation(self, state):
+        """
+        Get the memoized evaluation of a state, or None if the state has not been evaluated.
+        """
+
+        entry = self._get(self._evaluations, hash(state))
+        if (entry is None or entry[0] != _verificationHash(state)):
+            return None
+
+        return entry[1]
+
+    def put(self, state, depth, agentIndex, value, bound = EXACT, action = None):
+        entry = TableEntry(value, bound, action, _verificationHash(state))
+        self._put(self._entries, (hash(state), depth, agentIndex), entry)
+
+    def putEvaluation(self, state, value):
+        self._put(self._evaluations, hash(state), (_verificationHash(state), value))
+
+    def _get(self, table, key):
+        value = table.get(key)
+        if (value is not None):
+            table.move_to_end(key)
+
+        return value
+
+    def _put(self, table, key, value):
+        table[key] = value
+        table.move_to_end(key)
+
+        while (len(table) > self._maxSize):
+            table.popitem(last = False)
+
+    def __len__(self):
+        return len(self._entries)
+
+def _verificationHash(state):
+    """
+    A second hash of a state that does not depend on hash(state),
+    so states that collide in a `TranspositionTable` are still told apart.
+    Game states use their score, amount of food, and agent positions.
+    """
+
+    if (isinstance(state, AbstractGameState)):
+        positions = tuple([agentState.getPosition() for agentState in state.getAgentStates()])
+        return hash((state.getScore(), state.getNumFood(), positions))
+
+    return hash(repr(state))
@@ -18,9 +18,10 @@ from pacai.core.actions import Actions
 from pacai.core.distance import manhattan
 from pacai.core.game import Game
 from pacai.core.gamestate import AbstractGameState
-from pacai.core.grid import Grid
+from pacai.core.grid import BitGrid
 from pacai.core.layout import Layout
 from pacai.core.layout import getLayout
+from pacai.core import tensor
 from pacai.ui.capture.null import CaptureNullView
 from pacai.ui.capture.text import CaptureTextView
 from pacai.util import reflection
@@ -78,18 +79,20 @@ class CaptureGameState(AbstractGameState):
             else:
                 self._blueCapsules.append(capsule)
 
-        self._redFood = Grid(self._food.getWidth(), self._food.getHeight(), initialValue = False)
-        self._blueFood = Grid(self._food.getWidth(), self._food.getHeight(), initialValue = False)
+        # Red is on the left side, so red food lives in the low (column-major) bits of the food.
+        width = self._food.getWidth()
+        height = self._food.getHeight()
+        redMask = (1 << (int(self._layout.width / 2) * height)) - 1
 
-        for x in range(self._food.getWidth()):
-            for y in range(self._food.getHeight()):
-                if (not self._food[x][y]):
-                    continue
+        self._redFood = BitGrid.fromBits(width, height, self._food.getBits() & redMask)
+        self._blueFood = BitGrid.fromBits(width, height, self._food.getBits() & ~redMask)
 
-                if (self.isOnRedSide((x, y))):
-                    self._redFood[x][y] = True
-                else:
-                    self._blueFood[x][y] = True
+        self._numRedFood = self._redFood.count()
+        self._numBlueFood = self._blueFood.count()
+
+        # Built on first use, then kept up to date as food is eaten.
+        self._redFoodPositions = None
+        self._blueFoodPositions = None
 
     # Override
     def generateSuccessor(self, agentIndex, action):
@@ -124,16 +127,30 @@ class CaptureGameState(AbstractGameState):
 
     # Override
     def eatFood(self, x, y):
-        if (not self._foodCopied):
+        foodCopied = self._foodCopied
+
+        if (not super().eatFood(x, y)):
+            return False
+
+        if (not foodCopied):
             self._redFood = self._redFood.copy()
             self._blueFood = self._blueFood.copy()
 
-        super().eatFood(x, y)
-
         if (self.isOnRedSide((x, y))):
-            self._redFood[x][y] = False
+            self._redFood.set(x, y, False)
+            self._numRedFood -= 1
+            self._redFoodPositions = self._withoutPosition(self._redFoodPositions, (x, y))
         else:
-            self._blueFood[x][y] = False
+            self._blueFood.set(x, y, False)
+            self._numBlueFood -= 1
+            self._blueFoodPositions = self._withoutPosition(self._blueFoodPositions, (x, y))
+
+        return True
+
+    # Override
+    def undoMove(self):
+        super().undoMove()
+        self._timeleft += 1
 
     def getBlueCapsules(self):
         """
@@ -153,6 +170,17 @@ class CaptureGameState(AbstractGameState):
 
         return self._blueFood
 
+    def getBlueFoodPositions(self):
+        """
+        Returns a list of positions (x, y) of the food on the blue team's side.
+        The caller should not modify the list.
+        """
+
+        if (self._blueFoodPositions is None):
+            self._blueFoodPositions = self._blueFood.asList()
+
+        return self._blueFoodPositions
+
     def getBlueTeamIndices(self):
         """
         Returns a list of the agent index numbers for the agents on the blue team.
@@ -179,6 +207,17 @@ class CaptureGameState(AbstractGameState):
 
         return self._redFood
 
+    def getRedFoodPositions(self):
+        """
+        Returns a list of positions (x, y) of the food on the red team's side.
+        The caller should not modify the list.
+        """
+
+        if (self._redFoodPositions is None):
+            self._redFoodPositions = self._redFood.asList()
+
+        return self._redFoodPositions
+
     def getRedTeamIndices(self):
         """
         Returns a list of agent index numbers for the agents on the red team.
@@ -187,6 +226,24 @@ class CaptureGameState(AbstractGameState):
 
         return self._redTeam
 
+    def getNumBlueFood(self):
+        """
+        Get the amount of food left on the blue team's side.
+        """
+
+        return self._numBlueFood
+
+    def getNumRedFood(self):
+        """
+        Get the amount of food left on the red team's side.
+        """
+
+        return self._numRedFood
+
+    # Override
+    def getPlaneNames(self):
+        return tensor.CAPTURE_PLANES
+
     def getTimeleft(self):
         return self._timeleft
 
@@ -224,21 +281,70 @@ class CaptureGameState(AbstractGameState):
 
         return self._teams[agentIndex]
 
-    def _applySuccessorAction(self, agentIndex, action):
+    # Override
+    def _buildPlanes(self):
+        planes = super()._buildPlanes()
+
+        width = self._layout.getWidth()
+        height = self._layout.getHeight()
+
+        redAgents = [self._agentStates[index].getPosition() for index in self._redTeam]
+        blueAgents = [self._agentStates[index].getPosition() for index in self._blueTeam]
+
+        planes[tensor.PLANE_RED_TEAM] = tensor.positionsToPlane(width, height, redAgents)
+        planes[tensor.PLANE_BLUE_TEAM] = tensor.positionsToPlane(width, height, blueAgents)
+        planes[tensor.PLANE_RED_SIDE] = tensor.columnsToPlane(width, height,
+                0, int(self._layout.width / 2))
+
+        return planes
+
+    # Override
+    def _getUndoExtra(self):
+        return (self._redFoodPositions, self._blueFoodPositions,
+                self._redCapsules, self._blueCapsules)
+
+    # Override
+    def _uneatCapsule(self, x, y, record):
+        super()._uneatCapsule(x, y, record)
+        (_, _, self._redCapsules, self._blueCapsules) = record.extra
+
+    # Override
+    def _uneatFood(self, x, y, record):
+        foodCopied = self._foodCopied
+
+        super()._uneatFood(x, y, record)
+
+        if (not foodCopied):
+            self._redFood = self._redFood.copy()
+            self._blueFood = self._blueFood.copy()
+
+        if (self.isOnRedSide((x, y))):
+            self._redFood.set(x, y, True)
+            self._numRedFood += 1
+            self._redFoodPositions = record.extra[0]
+        else:
+            self._blueFood.set(x, y, True)
+            self._numBlueFood += 1
+            self._blueFoodPositions = record.extra[1]
+
+    # Override
+    def _applySuccessorAction(self, agentIndex, action, checkLegal = True):
         """
         Apply the action to the context state (self).
         """
 
+        self._changedAgents = []
+
         # Find appropriate rules for the agent.
-        AgentRules.applyAction(self, action, agentIndex)
+        AgentRules.applyAction(self, action, agentIndex, checkLegal = checkLegal)
         AgentRules.checkDeath(self, agentIndex)
-        AgentRules.decrementTimer(self.getAgentState(agentIndex))
+        AgentRules.decrementTimer(self.getMutableAgentState(agentIndex))
 
         # Book keeping.
         self._lastAgentMoved = agentIndex
         self._timeleft -= 1
 
-        self._hash = None
+        self._rehashAgents()
 
 class CaptureRules:
     """
@@ -255,8 +361,8 @@ class CaptureRules:
         game.state = initState
         game.length = length
 
-        self._totalBlueFood = initState.getBlueFood().count()
-        self._totalRedFood = initState.getRedFood().count()
+        self._totalBlueFood = initState.getNumBlueFood()
+        self._totalRedFood = initState.getNumRedFood()
 
         return game
 
@@ -279,10 +385,10 @@ class CaptureRules:
         redWin = False
         blueWin = False
 
-        if (state.getRedFood().count() <= MIN_FOOD):
+        if (state.getNumRedFood() <= MIN_FOOD):
             logging.info("The Blue team ate all but %d of the opponents' dots." % MIN_FOOD)
             blueWin = True
-        elif (state.getBlueFood().count() <= MIN_FOOD):
+        elif (state.getNumBlueFood() <= MIN_FOOD):
             logging.info("The Red team ate all but %d of the opponents' dots." % MIN_FOOD)
             redWin = True
         else:
@@ -342,20 +448,20 @@ class AgentRules:
         """
 
         agentState = state.getAgentState(agentIndex)
-        return Actions.getPossibleActions(agentState.getPosition(), agentState.getDirection(),
-                state.getWalls())
+        return state.getInitialLayout().getLegalActions(agentState.getPosition(),
+                agentState.getDirection())
 
     @staticmethod
-    def applyAction(state, action, agentIndex):
+    def applyAction(state, action, agentIndex, checkLegal = True):
         """
         Edits the state to reflect the results of the action.
+        The legality check can be skipped for actions that came from getLegalActions().
         """
 
-        legal = AgentRules.getLegalActions(state, agentIndex)
-        if (action not in legal):
+        if (checkLegal and action not in AgentRules.getLegalActions(state, agentIndex)):
             raise ValueError('Illegal action: ' + str(action))
 
-        agentState = state.getAgentState(agentIndex)
+        agentState = state.getMutableAgentState(agentIndex)
 
         # Update position.
         vector = Actions.directionToVector(action, AgentRules.AGENT_SPEED)
@@ -392,8 +498,8 @@ class AgentRules:
             else:
                 state.addScore(-FOOD_POINTS)
 
-            if ((isRed and state.getBlueFood().count() <= MIN_FOOD)
-                    or (not isRed and state.getRedFood().count() <= MIN_FOOD)):
+            if ((isRed and state.getNumBlueFood() <= MIN_FOOD)
+                    or (not isRed and state.getNumRedFood() <= MIN_FOOD)):
                 state.endGame(True)
 
             return
@@ -414,7 +520,7 @@ class AgentRules:
                 otherTeam = state.getRedTeamIndices()
 
             for agentIndex in otherTeam:
-                state.getAgentState(agentIndex).setScaredTimer(SCARED_TIME)
+                state.getMutableAgentState(agentIndex).setScaredTimer(SCARED_TIME)
 
     @staticmethod
     def decrementTimer(agentState):
@@ -455,9 +561,10 @@ class AgentRules:
             # Otherwise, we are being eatten.
             if (agentState.isBraveGhost() or otherAgentState.isScaredGhost()):
                 state.addScore(teamPointModifier * KILL_POINTS)
-                otherAgentState.respawn()
+                state.getMutableAgentState(otherAgentIndex).respawn()
             else:
                 state.addScore(teamPointModifier * -KILL_POINTS)
+                agentState = state.getMutableAgentState(agentIndex)
                 agentState.respawn()
 
 #############################
@@ -9,8 +9,16 @@ class AgentState:
     The convention for positions, like a graph, is that (0, 0) is the lower left corner,
     x increases horizontally and y increases vertically.
     Therefore, north is the direction of increasing y, or (0, 1).
+
+    Game states share agent states between successors (copy on write),
+    so treat any agent state you get from a game state as read-only.
     """
 
+    __slots__ = (
+        '_startPosition', '_startDirection', '_startIsPacman',
+        '_position', '_direction', '_isPacman', '_scaredTimer',
+    )
+
     def __init__(self, position, direction, isPacman):
         # Save the starting information for later use.
         self._startPosition = position
@@ -24,7 +32,12 @@ class AgentState:
         self._scaredTimer = 0
 
     def copy(self):
-        state = AgentState(self._startPosition, self._startDirection, self._startIsPacman)
+        # Skip the constructor, every slot is filled in right here.
+        state = AgentState.__new__(AgentState)
+
+        state._startPosition = self._startPosition
+        state._startDirection = self._startDirection
+        state._startIsPacman = self._startIsPacman
 
         state._isPacman = self._isPacman
         state._position = self._position
@@ -1,6 +1,3 @@
-from pacai.core.search.position import PositionSearchProblem
-from pacai.student import search
-
 def manhattan(position1, position2):
     """
     Manhattan distance between two position tuples (x, y).
@@ -17,14 +14,19 @@ def euclidean(position1, position2):
 
 def maze(position1, position2, gameState):
     """
-    Returns the maze distance between any two positions,
-    using the search functions you have already built.
+    Returns the maze distance between any two positions.
 
-    WARNING: `pacai.student.search.breadthFirstSearch` must already be implemted.
+    Distances come from a table that is built once per layout and shared by everyone
+    (see `pacai.core.distanceCalculator.getSharedDistances`),
+    so after the first call on a layout, each call is just a lookup.
+    If the walls of a layout are changed, call `clearMazeDistances`.
 
     Example usage: `distance.maze((2, 4), (5, 6), gameState)`.
     """
 
+    # Imported here, since the distance calculator uses this module.
+    from pacai.core import distanceCalculator
+
     x1, y1 = position1
     x2, y2 = position2
 
@@ -36,6 +38,21 @@ def maze(position1, position2, gameState):
     if (walls[x2][y2]):
         raise ValueError('Position2 is a wall: ' + str(position2))
 
-    prob = PositionSearchProblem(gameState, start = position1, goal = position2)
+    distances = distanceCalculator.getSharedDistances(gameState.getInitialLayout())
+
+    return distances.getDistance(position1, position2)
+
+def clearMazeDistances(gameState = None):
+    """
+    Forget the distances that `maze` uses for the given game's layout
+    (or for every layout, if no game state is given).
+    They will be recomputed the next time they are needed.
+    If the walls changed, also call `pacai.core.layout.Layout.clearDerivedData` afterwards.
+    """
+
+    from pacai.core import distanceCalculator
 
-    return len(search.breadthFirstSearch(prob))
+    if (gameState is None):
+        distanceCalculator.clearSharedDistances()
+    else:
+        distanceCalculator.clearSharedDistances(gameState.getInitialLayout())
@@ -1,10 +1,46 @@
+import abc
+import array
+import collections
+import heapq
+import logging
+import mmap
+import os
+import struct
 import sys
+import tempfile
+import time
 
 from pacai.core.distance import manhattan
-from pacai.util import priorityQueue
+from pacai.core.mazegraph import JunctionGraph
+from pacai.core.mazegraph import NO_NODE
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 DEFAULT_DISTANCE = 10000
 
+# The distance given for two cells that can not reach each other.
+UNREACHABLE_DISTANCE = sys.maxsize
+
+MAX_UINT16 = 0xFFFF
+MAX_UINT32 = 0xFFFFFFFF
+
+# The number of rows a `LazyDistanceTable` keeps by default.
+DEFAULT_LAZY_ROWS = 64
+
+# If this environment variable is set, computed distances are saved to (and loaded from)
+# the directory it names.
+DISTANCE_CACHE_ENV = 'PACAI_DISTANCE_CACHE'
+
+# Cache files are a fixed size header followed by the raw (little-endian) distance matrix.
+# Header: magic, version, array typecode, number of nodes, padding (to keep the data aligned).
+CACHE_HEADER = struct.Struct('<8sI4sI12x')
+CACHE_MAGIC = b'PACAIDST'
+CACHE_VERSION = 1
+CACHE_EXTENSION = '.dist'
+
 class Distancer(object):
     """
     A class for computing and caching the shortest path between any two points in a given maze.
@@ -23,6 +59,39 @@ class Distancer(object):
     def getMazeDistances(self):
         self.dc.run()
 
+    def computeMazeDistances(self, timeLimit):
+        """
+        A resumable alternative to `Distancer.getMazeDistances`.
+        Spend up to timeLimit seconds computing maze distances, and return true once they are done.
+        Call this again (e.g. with the spare time in each turn) until it returns true.
+
+        In the mean time, distances between cells that have not been computed
+        are the Manhattan distance (just like before any maze distances are computed).
+        """
+
+        self._distances = computeSharedDistances(self.dc.layout, timeLimit)
+        return self._distances.isComplete()
+
+    def getJunctionMazeDistances(self):
+        """
+        An alternative to `Distancer.getMazeDistances` for big mazes.
+        Only the distances between the maze's junctions are computed,
+        and every other distance is put together from them on the fly.
+        See `JunctionDistanceTable`, the table is shared (see `getSharedJunctionDistances`).
+        """
+
+        self._distances = getSharedJunctionDistances(self.dc.layout)
+
+    def getLazyMazeDistances(self, maxRows = DEFAULT_LAZY_ROWS):
+        """
+        An alternative to `Distancer.getMazeDistances` for big mazes.
+        Instead of computing all the distances up front,
+        distances from a position are computed the first time they are asked for.
+        See `LazyDistanceTable`.
+        """
+
+        self._distances = LazyDistanceTable(self.dc.layout.getMazeGraph(), maxRows)
+
     def getDistance(self, pos1, pos2):
         """
         The only function you will need after you create the object.
@@ -48,14 +117,77 @@ class Distancer(object):
         return bestDistance
 
     def getDistanceOnGrid(self, pos1, pos2):
-        key = (pos1, pos2)
-        if key in self._distances:
-            return self._distances[key]
+        distance = self._distances.getDistance(pos1, pos2)
+        if (distance is None):
+            raise Exception("Position not in grid: " + str((pos1, pos2)))
+
+        return distance
+
+    def getDistanceTable(self):
+        """
+        Get the `DistanceTable` behind this distancer,
+        or None if the maze distances have not been set up.
+        """
+
+        return self._distances
+
+    def getDistancesBetween(self, sources, targets):
+        """
+        Get the distance between each source and its target (sources[i] and targets[i])
+        as a NumPy array of floats, all at once.
+        Either list may also be a single position, which is paired with every position in the other.
+
+        Just like `Distancer.getDistance`, positions may be in between cells
+        (e.g. scared ghosts moving at half speed):
+        they are snapped to their neighboring cells and the extra distance is added.
+        Two cells that can not reach each other are `UNREACHABLE_DISTANCE` apart
+        (or `DEFAULT_DISTANCE` if either position is in between cells).
+        Requires NumPy.
+        """
+
+        _requireNumpy()
+
+        sources, targets = numpy.broadcast_arrays(
+                numpy.asarray(sources, dtype = float).reshape((-1, 2)),
+                numpy.asarray(targets, dtype = float).reshape((-1, 2)))
+
+        if (self._distances is None):
+            return numpy.abs(sources - targets).sum(axis = 1)
+
+        graph = self._distances.graph
+        sourceIds, sourceOffsets = _snapPositions(graph, sources)
+        targetIds, targetOffsets = _snapPositions(graph, targets)
+
+        # Every pairing of a source snap with a target snap: (number of pairs, 4, 4).
+        ids1, ids2 = numpy.broadcast_arrays(sourceIds[:, :, None], targetIds[:, None, :])
+        gridDistances = self._distances.getPairDistancesById(ids1.ravel(), ids2.ravel())
+
+        distances = (gridDistances.reshape(ids1.shape)
+                + sourceOffsets[:, :, None] + targetOffsets[:, None, :])
+        distances = distances.min(axis = (1, 2))
 
-        raise Exception("Position not in grid: " + str(key))
+        # Only the first snap of a position on a cell is used.
+        onGrid = numpy.isinf(sourceOffsets[:, 1:]).all(axis = 1)
+        onGrid &= numpy.isinf(targetOffsets[:, 1:]).all(axis = 1)
+
+        return numpy.where(onGrid,
+                numpy.where(numpy.isinf(distances), float(UNREACHABLE_DISTANCE), distances),
+                numpy.minimum(distances, DEFAULT_DISTANCE))
+
+    def getDistances(self, source, targets):
+        """
+        Get the distances from one (integer) position to each of the given (integer) positions.
+        See `DistanceTable.getDistances`.
+        Before the maze distances are ready, this gives a list of Manhattan distances.
+        """
+
+        if (self._distances is None):
+            return [manhattan(source, target) for target in targets]
+
+        return self._distances.getDistances(source, targets)
 
     def isReadyForMazeDistance(self):
-        return (self._distances is not None)
+        return (self._distances is not None and self._distances.isComplete())
 
 def isInt(pos):
     x, y = pos
@@ -78,79 +210,746 @@ def getGrids1D(x):
 # MACHINERY FOR COMPUTING MAZE DISTANCES #
 ##########################################
 
+# The distances shared by every agent and game in this process,
+# keyed by layout fingerprint (see getSharedDistances()).
 distanceMap = {}
 
+# The junction tables (see getSharedJunctionDistances()), keyed the same way.
+junctionMap = {}
+
+# Other shared per-layout data built on top of the distances (e.g. distance fields),
+# also keyed by layout fingerprint.
+# Modules add their maps here, so clearSharedDistances() clears them too.
+derivedMaps = []
+
 class DistanceCalculator:
     def __init__(self, layout, distancer):
         self.layout = layout
         self.distancer = distancer
-        self.cache = {}
 
     def run(self):
-        if self.layout.walls not in self.cache:
-            self.cache[self.layout.walls] = computeDistances(self.layout)
+        self.distancer._distances = getSharedDistances(self.layout)
 
-        self.distancer._distances = self.cache[self.layout.walls]
+class DistanceTable(abc.ABC):
+    """
+    The maze distances between open cells in a layout.
+
+    Cells are identified by their node ids in the layout's `pacai.core.mazegraph.MazeGraph`,
+    and distances are unsigned ints (usually 16-bit).
+    Each source has a row of distances to every node, indexed by node id.
+    In a row, cells that can not be reached hold `DistanceTable.unreachable`.
 
-def computeDistances(layout):
+    When NumPy is installed, rows can be read as (zero-copy) NumPy arrays,
+    so the distances to many targets can be looked up at once.
+
+    Children decide how rows are computed and stored (see `DistanceTable.getRow`).
     """
-    Runs UCS to all other positions from each position.
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.numNodes = graph.getNumNodes()
+
+        self.typecode, self.unreachable = _getDistanceType(self.numNodes)
+
+    def getDistance(self, pos1, pos2):
+        """
+        Get the maze distance between two (integer) positions.
+        Returns None if either position is not an open cell,
+        and `UNREACHABLE_DISTANCE` if the cells can not reach each other.
+        """
+
+        id1 = self.graph.getId(pos1)
+        id2 = self.graph.getId(pos2)
+
+        if (id1 == NO_NODE or id2 == NO_NODE):
+            return None
+
+        return self.getDistanceById(id1, id2)
+
+    def getDistanceById(self, id1, id2):
+        distance = self.getRow(id1)[id2]
+        if (distance == self.unreachable):
+            return UNREACHABLE_DISTANCE
+
+        return int(distance)
+
+    def getDistances(self, source, targets):
+        """
+        Get the distances from one (integer) position to each of the given (integer) positions.
+
+        With NumPy, this is a NumPy array (of the table's unsigned int type) gathered in one step.
+        Without NumPy, this is a list.
+        Either way, unreachable targets hold `DistanceTable.unreachable`.
+        """
+
+        sourceId = self._getIdOrRaise(source)
+        targetIds = [self._getIdOrRaise(target) for target in targets]
+
+        return self.getDistancesById(sourceId, targetIds)
+
+    def getDistancesById(self, sourceId, targetIds):
+        """
+        Like `DistanceTable.getDistances`, but with node ids
+        (a NumPy array of ids also works when NumPy is installed).
+        """
+
+        row = self.getRow(sourceId)
+
+        if (numpy is not None):
+            return row[numpy.asarray(targetIds, dtype = numpy.intp)]
+
+        return [row[targetId] for targetId in targetIds]
+
+    def getNumNodes(self):
+        return self.numNodes
+
+    def getPairDistancesById(self, ids1, ids2):
+        """
+        Get the distance between each pair of node ids (ids1[i] and ids2[i])
+        as a NumPy array of floats, with infinity for pairs that can not reach each other.
+        Requires NumPy.
+        """
+
+        _requireNumpy()
+
+        distances = numpy.fromiter((self.getDistanceById(int(id1), int(id2))
+                for (id1, id2) in zip(ids1, ids2)), dtype = float, count = len(ids1))
+        distances[distances == UNREACHABLE_DISTANCE] = numpy.inf
+
+        return distances
+
+    def isComplete(self):
+        """
+        Check if this table gives exact maze distances for every pair of cells.
+        """
+
+        return True
+
+    @abc.abstractmethod
+    def getRow(self, sourceId):
+        """
+        Get the distances from the given node to every node, indexed by node id.
+        This is a read-only view, not a copy:
+        a NumPy array if NumPy is installed, otherwise a memoryview.
+        """
+
+        pass
+
+    def _getIdOrRaise(self, position):
+        nodeId = self.graph.getId(position)
+        if (nodeId == NO_NODE):
+            raise Exception("Position not in grid: " + str(position))
+
+        return nodeId
+
+    def _viewRow(self, buffer, start):
+        """
+        Get a read-only view of the row that starts at the given index of the buffer.
+        """
+
+        if (numpy is not None):
+            row = numpy.frombuffer(buffer, dtype = self.typecode,
+                    count = self.numNodes, offset = start * buffer.itemsize)
+            row.flags.writeable = False
+            return row
+
+        return memoryview(buffer)[start:(start + self.numNodes)].toreadonly()
+
+class DistanceMatrix(DistanceTable):
     """
+    The maze distance between every pair of open cells in a layout, all computed up front.
 
-    distances = {}
-    allNodes = layout.walls.asList(False)
+    All the distances live in one flat read-only buffer:
+    the distance from node i to node j is `distances[i * numNodes + j]`.
+    """
 
-    for source in allNodes:
-        dist = {}
-        closed = {}
+    def __init__(self, graph, distances = None):
+        super().__init__(graph)
 
-        for node in allNodes:
-            dist[node] = sys.maxsize
+        if (distances is None):
+            distances = array.array(self.typecode, [self.unreachable]) * (self.numNodes ** 2)
+            for source in range(self.numNodes):
+                start = source * self.numNodes
+                distances[start:(start + self.numNodes)] = _computeRow(self, source)
 
-        queue = priorityQueue.PriorityQueue()
-        queue.push(source, 0)
-        dist[source] = 0
+            # Matrices are shared (see getSharedDistances()), so nobody gets to modify them.
+            distances = memoryview(distances).toreadonly()
 
-        while not queue.isEmpty():
-            node = queue.pop()
-            if node in closed:
-                continue
+        self.distances = distances
+
+    # Override
+    def getDistanceById(self, id1, id2):
+        distance = self.distances[id1 * self.numNodes + id2]
+        if (distance == self.unreachable):
+            return UNREACHABLE_DISTANCE
+
+        return distance
+
+    # Override
+    def getPairDistancesById(self, ids1, ids2):
+        _requireNumpy()
+
+        flat = numpy.frombuffer(self.distances, dtype = self.typecode)
+        indexes = numpy.asarray(ids1, dtype = numpy.intp) * self.numNodes
+        indexes += numpy.asarray(ids2, dtype = numpy.intp)
+
+        distances = flat[indexes].astype(float)
+        distances[flat[indexes] == self.unreachable] = numpy.inf
+
+        return distances
+
+    # Override
+    def getRow(self, sourceId):
+        return self._viewRow(self.distances, sourceId * self.numNodes)
+
+class LazyDistanceTable(DistanceTable):
+    """
+    Maze distances that are computed one source at a time, the first time a source is asked for.
+    Only the `maxRows` most recently used rows are kept (so memory stays bounded on huge mazes),
+    and hits and misses are counted so the size can be tuned.
+
+    Since maze distances are symmetric, a distance is also answered from the target's row
+    if that row is around.
+    """
+
+    def __init__(self, graph, maxRows = DEFAULT_LAZY_ROWS):
+        super().__init__(graph)
+
+        self._maxRows = max(1, int(maxRows))
+        self._rows = collections.OrderedDict()
+
+        self._hits = 0
+        self._misses = 0
+
+    def clear(self):
+        self._rows.clear()
+
+    # Override
+    def getDistanceById(self, id1, id2):
+        if (id1 not in self._rows and id2 in self._rows):
+            id1, id2 = id2, id1
+
+        distance = self._getRowArray(id1)[id2]
+        if (distance == self.unreachable):
+            return UNREACHABLE_DISTANCE
+
+        return distance
+
+    def getHits(self):
+        return self._hits
+
+    def getMisses(self):
+        return self._misses
+
+    def getNumRows(self):
+        """
+        Get the number of rows currently held.
+        """
+
+        return len(self._rows)
+
+    # Override
+    def getRow(self, sourceId):
+        return self._viewRow(self._getRowArray(sourceId), 0)
+
+    def getStats(self):
+        """
+        Get a dict of statistics about row lookups: hits, misses, and the number of rows held.
+        """
+
+        return {
+            'hits': self._hits,
+            'misses': self._misses,
+            'rows': len(self._rows),
+        }
+
+    def _getRowArray(self, sourceId):
+        row = self._rows.get(sourceId)
+
+        if (row is not None):
+            self._hits += 1
+            self._rows.move_to_end(sourceId)
+            return row
+
+        self._misses += 1
+
+        row = _computeRow(self, sourceId)
+        self._rows[sourceId] = row
+
+        while (len(self._rows) > self._maxRows):
+            self._rows.popitem(last = False)
+
+        return row
+
+class JunctionDistanceTable(DistanceTable):
+    """
+    Maze distances from a corridor-contracted maze (see `pacai.core.mazegraph.JunctionGraph`).
+    Only the distances between junctions are computed (with Dijkstra's algorithm),
+    so memory is quadratic in the number of junctions instead of the number of cells.
+
+    Any other distance is put together in constant time from the cells' exits:
+    the distance from each cell to the ends of its corridor, plus the distance between the ends.
+    Two cells in the same corridor may also just walk down the corridor to each other.
+    """
+
+    def __init__(self, graph):
+        super().__init__(graph)
+
+        self.junctionGraph = JunctionGraph(graph)
+        self.numJunctions = self.junctionGraph.getNumJunctions()
 
-            closed[node] = True
-            nodeDist = dist[node]
-            adjacent = []
-            x, y = node
+        self.junctionDistances = array.array(self.typecode,
+                [self.unreachable]) * (self.numJunctions ** 2)
 
-            if not layout.isWall((x, y + 1)):
-                adjacent.append((x, y + 1))
+        for source in range(self.numJunctions):
+            start = source * self.numJunctions
+            self.junctionDistances[start:(start + self.numJunctions)] = self._computeJunctionRow(
+                    source)
 
-            if not layout.isWall((x, y - 1)):
-                adjacent.append((x, y - 1))
+        self.junctionDistances = memoryview(self.junctionDistances).toreadonly()
 
-            if not layout.isWall((x + 1, y)):
-                adjacent.append((x + 1, y))
+    # Override
+    def getDistanceById(self, id1, id2):
+        if (id1 == id2):
+            return 0
 
-            if not layout.isWall((x - 1, y)):
-                adjacent.append((x - 1, y))
+        junctionGraph = self.junctionGraph
+        junctionDistances = self.junctionDistances
+        numJunctions = self.numJunctions
+        unreachable = self.unreachable
 
-            for other in adjacent:
-                if other not in dist:
+        best = UNREACHABLE_DISTANCE
+
+        corridor = junctionGraph.corridorIds[id1]
+        if (corridor != NO_NODE and corridor == junctionGraph.corridorIds[id2]):
+            best = abs(junctionGraph.corridorOffsets[id1] - junctionGraph.corridorOffsets[id2])
+
+        for (junction1, distance1) in junctionGraph.exits[id1]:
+            start = junction1 * numJunctions
+
+            for (junction2, distance2) in junctionGraph.exits[id2]:
+                junctionDistance = junctionDistances[start + junction2]
+                if (junctionDistance == unreachable):
                     continue
 
-                oldDist = dist[other]
-                newDist = nodeDist + 1
-                if newDist < oldDist:
-                    dist[other] = newDist
-                    queue.push(other, newDist)
+                distance = distance1 + junctionDistance + distance2
+                if (distance < best):
+                    best = distance
+
+        return best
+
+    def getNumJunctions(self):
+        return self.numJunctions
+
+    # Override
+    def getRow(self, sourceId):
+        """
+        Get a row of distances (see `DistanceTable.getRow`).
+        Rows are not stored, so each call puts together a new one.
+        """
+
+        row = array.array(self.typecode, [self.unreachable]) * self.numNodes
+        for target in range(self.numNodes):
+            distance = self.getDistanceById(sourceId, target)
+            if (distance != UNREACHABLE_DISTANCE):
+                row[target] = distance
+
+        return self._viewRow(row, 0)
+
+    def _computeJunctionRow(self, source):
+        """
+        Compute the distances from the source junction to every junction.
+        """
+
+        distances = [self.unreachable] * self.numJunctions
+        distances[source] = 0
+
+        queue = [(0, source)]
+        while (len(queue) > 0):
+            distance, junction = heapq.heappop(queue)
+            if (distance > distances[junction]):
+                continue
+
+            for (neighbor, length) in self.junctionGraph.getEdges(junction).items():
+                if (distance + length < distances[neighbor]):
+                    distances[neighbor] = distance + length
+                    heapq.heappush(queue, (distance + length, neighbor))
+
+        return array.array(self.typecode, distances)
+
+class PartialDistanceMatrix(DistanceTable):
+    """
+    A `DistanceMatrix` that is filled in a few rows at a time (see `PartialDistanceMatrix.compute`),
+    so the work can be spread over spare time (e.g. the time left over in each turn).
+
+    Until a pair of cells is covered by a computed row (of either cell),
+    its distance is the Manhattan distance.
+    Once every row is computed, `PartialDistanceMatrix.toMatrix` gives the finished matrix.
+    """
+
+    def __init__(self, graph):
+        super().__init__(graph)
+
+        self._distances = array.array(self.typecode, [self.unreachable]) * (self.numNodes ** 2)
+        self._computed = bytearray(self.numNodes)
+        self._nextSource = 0
+
+    def compute(self, timeLimit = None):
+        """
+        Compute rows for up to timeLimit seconds (or until done, if there is no limit).
+        At least one row is always computed.
+        Returns true if the matrix is complete.
+        """
+
+        startTime = time.time()
+
+        while (self._nextSource < self.numNodes):
+            source = self._nextSource
+            start = source * self.numNodes
+
+            self._distances[start:(start + self.numNodes)] = _computeRow(self, source)
+            self._computed[source] = 1
+            self._nextSource += 1
+
+            if (timeLimit is not None and time.time() - startTime >= timeLimit):
+                break
+
+        return self.isComplete()
+
+    # Override
+    def getDistanceById(self, id1, id2):
+        if (not self._computed[id1]):
+            if (not self._computed[id2]):
+                return manhattan(self.graph.getPosition(id1), self.graph.getPosition(id2))
+
+            id1, id2 = id2, id1
+
+        distance = self._distances[id1 * self.numNodes + id2]
+        if (distance == self.unreachable):
+            return UNREACHABLE_DISTANCE
+
+        return distance
+
+    def getNumComputed(self):
+        """
+        Get the number of rows that have been computed.
+        """
+
+        return self._nextSource
+
+    # Override
+    def getRow(self, sourceId):
+        """
+        Get a row of distances (see `DistanceTable.getRow`).
+        Rows that have not been computed yet are Manhattan distances.
+        """
+
+        if (self._computed[sourceId]):
+            return self._viewRow(self._distances, sourceId * self.numNodes)
+
+        source = self.graph.getPosition(sourceId)
+        row = array.array(self.typecode,
+                [manhattan(source, target) for target in self.graph.positions])
+
+        return self._viewRow(row, 0)
+
+    # Override
+    def isComplete(self):
+        return self._nextSource >= self.numNodes
+
+    def toMatrix(self):
+        """
+        Get the finished (read-only) `DistanceMatrix`, without copying the distances.
+        """
+
+        if (not self.isComplete()):
+            raise RuntimeError('The distance matrix is not complete.')
+
+        return DistanceMatrix(self.graph, memoryview(self._distances).toreadonly())
+
+def computeDistances(layout, cacheDir = None):
+    """
+    Compute the maze distances between all pairs of open cells in the layout
+    with a breadth-first search from each cell.
+    Returns a `DistanceMatrix`.
+
+    If a cache directory is given (or set with the `DISTANCE_CACHE_ENV` environment variable),
+    then distances already computed for a layout with the same fingerprint
+    (see `pacai.core.layout.Layout.getFingerprint`) are mapped from disk instead,
+    and newly computed distances are saved there for next time.
+    """
+
+    if (cacheDir is None):
+        cacheDir = os.environ.get(DISTANCE_CACHE_ENV)
+
+    if (not cacheDir):
+        return DistanceMatrix(layout.getMazeGraph())
+
+    matrix = loadDistances(layout, cacheDir)
+    if (matrix is None):
+        matrix = DistanceMatrix(layout.getMazeGraph())
+        saveDistances(layout, matrix, cacheDir)
+
+    return matrix
+
+def clearSharedDistances(layout = None):
+    """
+    Forget the shared distances (see `getSharedDistances`) for a layout,
+    or for all layouts if no layout is given (e.g. to free up memory).
+    The shared junction tables and everything shared that was built from the distances
+    (see `derivedMaps`) are forgotten as well,
+    and so is any cached matrix mapped from disk (see `loadDistances`).
+    Anyone already holding a matrix can keep using it.
+
+    The layout itself (its hash keys, legal moves, maze graph, etc.) is left alone.
+    If a layout's walls have been changed, call this before
+    `pacai.core.layout.Layout.clearDerivedData` (which also changes the fingerprint).
+    """
+
+    if (layout is None):
+        distanceMap.clear()
+        junctionMap.clear()
+        for derivedMap in derivedMaps:
+            derivedMap.clear()
+
+        return
+
+    # The fingerprint is also cached, so this is the one the distances were stored under.
+    fingerprint = layout.getFingerprint()
+
+    distanceMap.pop(fingerprint, None)
+    junctionMap.pop(fingerprint, None)
+    for derivedMap in derivedMaps:
+        derivedMap.pop(fingerprint, None)
+
+def getCachePath(layout, cacheDir):
+    return os.path.join(cacheDir, layout.getFingerprint() + CACHE_EXTENSION)
 
-        for target in allNodes:
-            distances[(target, source)] = dist[target]
+def computeSharedDistances(layout, timeLimit = None):
+    """
+    Work on the shared distances for a layout (see `getSharedDistances`)
+    for up to timeLimit seconds.
+    Returns the `DistanceMatrix` if the distances are done,
+    and the (shared) `PartialDistanceMatrix` otherwise.
+    Since the partial matrix is shared, everyone working on the same maze adds to the same rows.
+    """
+
+    fingerprint = layout.getFingerprint()
+
+    distances = distanceMap.get(fingerprint)
+    if (distances is None):
+        cacheDir = os.environ.get(DISTANCE_CACHE_ENV)
+        if (cacheDir):
+            distances = loadDistances(layout, cacheDir)
+
+        if (distances is None):
+            distances = PartialDistanceMatrix(layout.getMazeGraph())
+
+        distanceMap[fingerprint] = distances
+
+    if (not isinstance(distances, PartialDistanceMatrix)):
+        return distances
+
+    if (not distances.compute(timeLimit)):
+        return distances
+
+    matrix = distances.toMatrix()
+    distanceMap[fingerprint] = matrix
+
+    cacheDir = os.environ.get(DISTANCE_CACHE_ENV)
+    if (cacheDir):
+        saveDistances(layout, matrix, cacheDir)
+
+    return matrix
+
+def getSharedDistances(layout):
+    """
+    Get the `DistanceMatrix` for a layout that is shared by the whole process.
+    Distances are only computed (or loaded, see `computeDistances`) the first time
+    a layout with a given fingerprint is seen,
+    so all the agents in a game and all the games on the same maze share one matrix.
+    The matrix is read-only.
+    """
+
+    return computeSharedDistances(layout)
+
+def getSharedJunctionDistances(layout):
+    """
+    Get the `JunctionDistanceTable` for a layout that is shared by the whole process.
+    Like `getSharedDistances`, it is only built the first time a layout is seen.
+    """
+
+    fingerprint = layout.getFingerprint()
+    if (fingerprint not in junctionMap):
+        junctionMap[fingerprint] = JunctionDistanceTable(layout.getMazeGraph())
+
+    return junctionMap[fingerprint]
+
+def loadDistances(layout, cacheDir):
+    """
+    Map a cached `DistanceMatrix` for the layout (read-only) from the cache directory.
+    The distances are not read into memory, the OS will page them in (and share them across
+    processes) as they are used.
+    Returns None if there is no usable cache file.
+    """
+
+    if (sys.byteorder != 'little'):
+        return None
+
+    path = getCachePath(layout, cacheDir)
+    if (not os.path.isfile(path)):
+        return None
+
+    graph = layout.getMazeGraph()
 
-    return distances
+    try:
+        with open(path, 'rb') as file:
+            data = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+    except (OSError, ValueError) as ex:
+        logging.warning('Unable to open cached distances "%s". -- %s' % (path, str(ex)))
+        return None
+
+    if (len(data) < CACHE_HEADER.size):
+        logging.warning('Ignoring truncated cached distances: "%s".' % (path))
+        return None
+
+    magic, version, typecode, numNodes = CACHE_HEADER.unpack_from(data)
+    typecode = typecode.rstrip(b'\0').decode()
+
+    if (magic != CACHE_MAGIC or version != CACHE_VERSION or numNodes != graph.getNumNodes()
+            or typecode != _getDistanceType(numNodes)[0]):
+        logging.warning('Ignoring unrecognized cached distances: "%s".' % (path))
+        return None
+
+    itemsize = array.array(typecode).itemsize
+    if (len(data) != CACHE_HEADER.size + (numNodes ** 2) * itemsize):
+        logging.warning('Ignoring truncated cached distances: "%s".' % (path))
+        return None
+
+    distances = memoryview(data)[CACHE_HEADER.size:].cast(typecode)
+
+    return DistanceMatrix(graph, distances)
+
+def saveDistances(layout, matrix, cacheDir):
+    """
+    Save a `DistanceMatrix` for the layout to the cache directory.
+    The file is written under a temporary name and then moved into place,
+    so other processes never see a partial file.
+    Failures are logged and ignored, since the cache is only an optimization.
+    """
+
+    if (sys.byteorder != 'little'):
+        return
+
+    path = getCachePath(layout, cacheDir)
+    header = CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, matrix.typecode.encode(),
+            matrix.numNodes)
+
+    try:
+        os.makedirs(cacheDir, exist_ok = True)
+
+        handle, tempPath = tempfile.mkstemp(dir = cacheDir, suffix = CACHE_EXTENSION + '.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as file:
+                file.write(header)
+                file.write(matrix.distances)
+
+            os.replace(tempPath, path)
+        except BaseException:
+            os.remove(tempPath)
+            raise
+    except OSError as ex:
+        logging.warning('Unable to cache distances in "%s". -- %s' % (cacheDir, str(ex)))
 
 def getDistanceOnGrid(distances, pos1, pos2):
-    key = (pos1, pos2)
-    if key in distances:
-        return distances[key]
+    distance = distances.getDistance(pos1, pos2)
+    if (distance is None):
+        return DEFAULT_DISTANCE
+
+    return distance
+
+def _getDistanceType(numNodes):
+    """
+    Get the array typecode and the unreachable marker for a matrix with the given number of nodes.
+    Distances are always less than the number of nodes, so they fit in 16 bits
+    (except on enormous mazes).
+    """
+
+    if (numNodes < MAX_UINT16):
+        return ('H', MAX_UINT16)
+
+    return ('I', MAX_UINT32)
+
+def _computeRow(table, source):
+    """
+    Compute the distances from the source node to every node of a table's graph
+    with a breadth-first search.
+    Returns an `array.array` of the table's type.
+    """
+
+    offsets = table.graph.offsets
+    neighbors = table.graph.neighbors
+    unreachable = table.unreachable
+
+    row = [unreachable] * table.numNodes
+    row[source] = 0
+
+    frontier = [source]
+    distance = 0
+
+    while (len(frontier) > 0):
+        distance += 1
+        nextFrontier = []
+
+        for node in frontier:
+            for neighbor in neighbors[offsets[node]:offsets[node + 1]]:
+                if (row[neighbor] == unreachable):
+                    row[neighbor] = distance
+                    nextFrontier.append(neighbor)
+
+        frontier = nextFrontier
+
+    return array.array(table.typecode, row)
+
+def _requireNumpy():
+    if (numpy is None):
+        raise RuntimeError('NumPy is required for batched distances, but it is not installed.')
+
+def _snapPositions(graph, positions):
+    """
+    Snap an (n, 2) array of positions to the cells around them (see getGrids2D()).
+    Returns two (n, 4) arrays: the node id of each snapped cell,
+    and the distance from the position to that cell.
+    Positions on a cell only use their first snap, the other snaps are infinitely far away.
+    """
+
+    floors = numpy.floor(positions)
+    fractions = positions - floors
+
+    # For each axis, snap down and up. Positions on the line only snap down.
+    cells = numpy.stack([floors, floors + 1], axis = 1)
+    offsets = numpy.stack([fractions, 1 - fractions], axis = 1)
+    offsets[:, 1][fractions == 0] = numpy.inf
+
+    # All four (x snap, y snap) combinations: (n, 4).
+    xs = numpy.repeat(cells[:, :, 0], 2, axis = 1).astype(numpy.intp)
+    ys = numpy.tile(cells[:, :, 1], 2).astype(numpy.intp)
+    snapOffsets = numpy.repeat(offsets[:, :, 0], 2, axis = 1) + numpy.tile(offsets[:, :, 1], 2)
+
+    used = ~numpy.isinf(snapOffsets)
+    inBounds = (xs >= 0) & (ys >= 0) & (xs < graph.width) & (ys < graph.height)
+
+    cellIds = numpy.frombuffer(graph.cellIds, dtype = numpy.intc)
+    ids = numpy.full(xs.shape, NO_NODE, dtype = numpy.intp)
+    ids[inBounds] = cellIds[xs[inBounds] * graph.height + ys[inBounds]]
+
+    missing = used & (ids == NO_NODE)
+    if (missing.any()):
+        row, column = numpy.argwhere(missing)[0]
+        position = (int(xs[row, column]), int(ys[row, column]))
+        raise Exception("Position not in grid: " + str(position))
+
+    # Unused snaps can point anywhere, their distance is infinite anyway.
+    ids[~used] = 0
 
-    return DEFAULT_DISTANCE
+    return ids, snapOffsets
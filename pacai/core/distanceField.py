@@ -0,0 +1,297 @@
+"""
+Distance fields: the maze distance from every cell to the nearest of a set of targets.
+"""
+
+import array
+import heapq
+
+from pacai.core import distanceCalculator
+from pacai.core.distanceCalculator import UNREACHABLE_DISTANCE
+from pacai.core.distanceCalculator import getGrids2D
+from pacai.core.distanceCalculator import isInt
+from pacai.core.mazegraph import NO_NODE
+from pacai.util.util import nearestPoint
+
+# The distance stored for cells that no target can reach.
+UNREACHED = 0x7FFFFFFF
+
+# When setting a whole new set of targets,
+# just start over if more than this fraction of the targets changed.
+REBUILD_FRACTION = 0.5
+
+# Fields shared by everything in this process, keyed by layout fingerprint and then by name.
+# These are forgotten along with the layout's shared distances.
+fieldMap = {}
+distanceCalculator.derivedMaps.append(fieldMap)
+
+class DistanceField(object):
+    """
+    The maze distance from every open cell to its nearest target (e.g. food, capsules, or ghosts),
+    and which target that is.
+    Lookups are constant time.
+
+    The field is kept up to date as targets come and go:
+    adding a target only searches the cells that get closer to it,
+    and removing a target (e.g. when a pellet is eaten)
+    only searches the cells that it was the nearest target for.
+    Moving a target (e.g. a ghost) is a removal and an addition.
+
+    Targets are positions, and any number of targets may share a cell.
+    Targets in between cells (e.g. moving ghosts) are snapped to their nearest cell.
+
+    Example:
+    ```
+    field = DistanceField(gameState.getInitialLayout(), gameState.getFoodPositions())
+    field.getDistance(gameState.getPacmanPosition())
+    ```
+    """
+
+    def __init__(self, layout, targets = ()):
+        self._graph = layout.getMazeGraph()
+        numNodes = self._graph.getNumNodes()
+
+        # For each node: the distance to the nearest target, and the node that target is on.
+        self._distances = array.array('i', [UNREACHED]) * numNodes
+        self._owners = array.array('i', [NO_NODE]) * numNodes
+
+        # The number of targets on each node that has any.
+        self._counts = {}
+
+        self.setTargets(targets)
+
+    def addTarget(self, position):
+        node = self._getNode(position)
+
+        count = self._counts.get(node, 0)
+        self._counts[node] = count + 1
+
+        if (count == 0):
+            self._addSource(node)
+
+    def getDistance(self, position):
+        """
+        Get the maze distance from a position to its nearest target,
+        or `pacai.core.distanceCalculator.UNREACHABLE_DISTANCE` if no target can be reached.
+        Like `pacai.core.distanceCalculator.Distancer.getDistance`,
+        positions in between cells are snapped to their neighboring cells
+        and the extra distance is added.
+        """
+
+        if (isInt(position)):
+            distance = self._distances[self._getNode(position)]
+            if (distance == UNREACHED):
+                return UNREACHABLE_DISTANCE
+
+            return distance
+
+        best = UNREACHABLE_DISTANCE
+        for (snap, snapDistance) in getGrids2D(position):
+            distance = self._distances[self._getNode(snap)]
+            if (distance != UNREACHED and distance + snapDistance < best):
+                best = distance + snapDistance
+
+        return best
+
+    def getNearestTarget(self, position):
+        """
+        Get the position of the target nearest to the given (integer) position,
+        or None if no target can be reached.
+        Ties are broken arbitrarily.
+        """
+
+        owner = self._owners[self._getNode(position)]
+        if (owner == NO_NODE):
+            return None
+
+        return self._graph.getPosition(owner)
+
+    def getNumTargets(self):
+        return sum(self._counts.values())
+
+    def moveTarget(self, oldPosition, newPosition):
+        if (self._getNode(oldPosition) == self._getNode(newPosition)):
+            return
+
+        self.removeTarget(oldPosition)
+        self.addTarget(newPosition)
+
+    def removeTarget(self, position):
+        node = self._getNode(position)
+
+        count = self._counts.get(node, 0)
+        if (count == 0):
+            raise ValueError('There is no target at: ' + str(position))
+
+        if (count > 1):
+            self._counts[node] = count - 1
+            return
+
+        del self._counts[node]
+        self._removeSource(node)
+
+    def setTargets(self, positions):
+        """
+        Replace all the targets.
+        Only the differences from the current targets are applied,
+        unless most of the targets changed (then the field is just rebuilt).
+        """
+
+        counts = {}
+        for position in positions:
+            node = self._getNode(position)
+            counts[node] = counts.get(node, 0) + 1
+
+        removed = [node for node in self._counts if (node not in counts)]
+        added = [node for node in counts if (node not in self._counts)]
+
+        if (len(removed) + len(added) > REBUILD_FRACTION * max(1, len(counts))):
+            self._counts = counts
+            self._rebuild()
+            return
+
+        self._counts = counts
+
+        for node in removed:
+            self._removeSource(node)
+
+        for node in added:
+            self._addSource(node)
+
+    def _addSource(self, source):
+        """
+        Make a node a source, and pull in the cells that are now closer to it.
+        """
+
+        offsets = self._graph.offsets
+        neighbors = self._graph.neighbors
+        distances = self._distances
+        owners = self._owners
+
+        distances[source] = 0
+        owners[source] = source
+
+        frontier = [source]
+        distance = 0
+
+        while (len(frontier) > 0):
+            distance += 1
+            nextFrontier = []
+
+            for node in frontier:
+                for neighbor in neighbors[offsets[node]:offsets[node + 1]]:
+                    if (distance < distances[neighbor]):
+                        distances[neighbor] = distance
+                        owners[neighbor] = source
+                        nextFrontier.append(neighbor)
+
+            frontier = nextFrontier
+
+    def _getNode(self, position):
+        if (not isInt(position)):
+            position = nearestPoint(position)
+
+        node = self._graph.getId(position)
+        if (node == NO_NODE):
+            raise ValueError('Position is not in the maze: ' + str(position))
+
+        return node
+
+    def _rebuild(self):
+        """
+        Compute the whole field with a breadth-first search from all the sources at once.
+        """
+
+        numNodes = self._graph.getNumNodes()
+
+        self._distances = array.array('i', [UNREACHED]) * numNodes
+        self._owners = array.array('i', [NO_NODE]) * numNodes
+
+        offsets = self._graph.offsets
+        neighbors = self._graph.neighbors
+        distances = self._distances
+        owners = self._owners
+
+        frontier = list(self._counts)
+        for node in frontier:
+            distances[node] = 0
+            owners[node] = node
+
+        distance = 0
+        while (len(frontier) > 0):
+            distance += 1
+            nextFrontier = []
+
+            for node in frontier:
+                for neighbor in neighbors[offsets[node]:offsets[node + 1]]:
+                    if (distances[neighbor] == UNREACHED):
+                        distances[neighbor] = distance
+                        owners[neighbor] = owners[node]
+                        nextFrontier.append(neighbor)
+
+            frontier = nextFrontier
+
+    def _removeSource(self, source):
+        """
+        Stop a node from being a source.
+        Only the cells that it was the nearest source for need new distances,
+        and those are filled back in from the cells around them.
+        """
+
+        offsets = self._graph.offsets
+        neighbors = self._graph.neighbors
+        distances = self._distances
+        owners = self._owners
+
+        # Every cell owned by the source is connected to it through other cells it owns.
+        region = [source]
+        owners[source] = NO_NODE
+        distances[source] = UNREACHED
+
+        i = 0
+        while (i < len(region)):
+            node = region[i]
+            i += 1
+
+            for neighbor in neighbors[offsets[node]:offsets[node + 1]]:
+                if (owners[neighbor] == source):
+                    owners[neighbor] = NO_NODE
+                    distances[neighbor] = UNREACHED
+                    region.append(neighbor)
+
+        # Seed the region from its border, then grow back in (nearest first).
+        queue = []
+        for node in region:
+            for neighbor in neighbors[offsets[node]:offsets[node + 1]]:
+                if (owners[neighbor] != NO_NODE):
+                    queue.append((distances[neighbor] + 1, node, owners[neighbor]))
+
+        heapq.heapify(queue)
+
+        while (len(queue) > 0):
+            distance, node, owner = heapq.heappop(queue)
+            if (distance >= distances[node]):
+                continue
+
+            distances[node] = distance
+            owners[node] = owner
+
+            for neighbor in neighbors[offsets[node]:offsets[node + 1]]:
+                if (distance + 1 < distances[neighbor]):
+                    heapq.heappush(queue, (distance + 1, neighbor, owner))
+
+def getSharedField(layout, name):
+    """
+    Get a `DistanceField` for a layout that is shared by the whole process under the given name
+    (e.g. 'food'), starting with no targets.
+    Whoever uses a shared field is responsible for keeping its targets up to date.
+    The field is dropped by `pacai.core.distanceCalculator.clearSharedDistances`.
+    """
+
+    fields = fieldMap.setdefault(layout.getFingerprint(), {})
+
+    field = fields.get(name)
+    if (field is None):
+        field = DistanceField(layout)
+        fields[name] = field
+
+    return field
@@ -4,9 +4,9 @@ Feature extractors for game states.
 
 import abc
 
+from pacai.core import distanceField
 from pacai.core.actions import Actions
-from pacai.core.search import search
-from pacai.student.searchAgents import AnyFoodSearchProblem
+from pacai.core.distanceCalculator import UNREACHABLE_DISTANCE
 
 class FeatureExtractor(abc.ABC):
     """
@@ -36,6 +36,11 @@ class SimpleExtractor(FeatureExtractor):
     Returns simple features for a basic reflex Pacman.
     """
 
+    # The name of the shared distance field to the nearest food.
+    # It is shared by all extractors (which are often built fresh for each call),
+    # and kept up to date as food is eaten.
+    FOOD_FIELD = 'simpleExtractor.food'
+
     def getFeatures(self, state, action):
         # Extract the grid of food and wall locations and get the ghost locations.
         food = state.getFood()
@@ -58,9 +63,8 @@ class SimpleExtractor(FeatureExtractor):
         if not features["#-of-ghosts-1-step-away"] and food[next_x][next_y]:
             features["eats-food"] = 1.0
 
-        prob = AnyFoodSearchProblem(state, start = (next_x, next_y))
-        dist = len(search.bfs(prob))
-        if dist is not None:
+        dist = self._getFoodField(state).getDistance((next_x, next_y))
+        if (dist != UNREACHABLE_DISTANCE):
             # Make the distance a number less than one otherwise the update will diverge wildly.
             features["closest-food"] = float(dist) / (walls.getWidth() * walls.getHeight())
 
@@ -68,3 +72,9 @@ class SimpleExtractor(FeatureExtractor):
             features[key] /= 10.0
 
         return features
+
+    def _getFoodField(self, state):
+        field = distanceField.getSharedField(state.getInitialLayout(), SimpleExtractor.FOOD_FIELD)
+        field.setTargets(state.getFoodPositions())
+
+        return field
@@ -1,9 +1,8 @@
 import abc
-import copy
 
 from pacai.core.agentstate import AgentState
 from pacai.core.directions import Directions
-from pacai.util import util
+from pacai.core import tensor
 
 class AbstractGameState(abc.ABC):
     """
@@ -22,9 +21,12 @@ class AbstractGameState(abc.ABC):
 
         self._layout = layout
 
-        # Keep a copy of the hash, since it is expensive to compute.
-        # Any children should be sure to clear the hash when modifications are made.
-        self._hash = None
+        # The hash is a Zobrist-style hash that is kept up to date as the state changes.
+        # Food and capsules use random per-cell keys from the layout,
+        # while agents, score, and the game over flags XOR in a hash of their values.
+        # Any children that apply moves should call _rehashAgents() when they are done.
+        self._hash = 0
+        self._foodKeys, self._capsuleKeys = layout.getHashKeys()
 
         # For food and capsules, we will only copy on write (if we eat one of them).
         # This avoid additional copies on successors that don't eat.
@@ -33,6 +35,11 @@ class AbstractGameState(abc.ABC):
         self._food = layout.food.copy()
         self._lastFoodEaten = None
 
+        # Keep the amount of food and (once asked for) the food positions
+        # up to date as food is eaten, so nobody has to scan the grid.
+        self._numFood = self._food.count()
+        self._foodPositions = None
+
         self._capsulesCopied = False
         self._capsules = layout.capsules.copy()
         self._lastCapsuleEaten = None
@@ -45,8 +52,26 @@ class AbstractGameState(abc.ABC):
         for (isPacman, position) in layout.agentPositions:
             self._agentStates.append(AgentState(position, Directions.STOP, isPacman))
 
+        # Agent states are shared with the parent state until they are written to.
+        # Rules must go through getMutableAgentState() before modifying an agent.
+        self._agentStatesCopied = [True] * len(self._agentStates)
+
+        # (index, old agent state) for every agent copied during the current move.
+        self._changedAgents = []
+
         self._score = 0
 
+        self._hash = self._computeHash()
+
+        # Records for undoMove(), built on the first applyMove().
+        # While a move is being applied, its record is also kept in _undoRecord.
+        self._undoStack = None
+        self._undoRecord = None
+
+        # NumPy encodings of this state, built on first use (see getPlanes()).
+        self._planes = None
+        self._tensor = None
+
     @abc.abstractmethod
     def generateSuccessor(self, agentIndex, action):
         """
@@ -56,6 +81,36 @@ class AbstractGameState(abc.ABC):
 
         pass
 
+    def generateSuccessors(self, agentIndex, actions = None):
+        """
+        Returns a list of (action, successor) pairs,
+        one for each legal action of the specified agent (or just for the given actions).
+        This is the same as calling `AbstractGameState.generateSuccessor` for each action,
+        but the terminal check, legal actions, and the shared part of the successors
+        are only computed once, and actions from the legal list are not checked again.
+        All the siblings share this state's food, capsules, and unchanged agents.
+        A terminal state has no successors.
+        """
+
+        if (self.isOver()):
+            return []
+
+        # Actions from our own legal list do not need to be checked again.
+        checkLegal = (actions is not None)
+        if (actions is None):
+            actions = self.getLegalActions(agentIndex)
+
+        # The shared part of the siblings is only built once.
+        template = self._getSuccessorTemplate()
+
+        successors = []
+        for action in actions:
+            successor = self._initSuccessor(template)
+            successor._applySuccessorAction(agentIndex, action, checkLegal = checkLegal)
+            successors.append((action, successor))
+
+        return successors
+
     @abc.abstractmethod
     def getLegalActions(self, agentIndex = 0):
         """
@@ -64,9 +119,81 @@ class AbstractGameState(abc.ABC):
 
         pass
 
+    def applyMove(self, agentIndex, action):
+        """
+        Apply the action to this state in place (instead of making a successor),
+        and remember how to take it back with `AbstractGameState.undoMove`.
+        After this call, this state looks just like `generateSuccessor(agentIndex, action)`.
+
+        This is meant for depth-first searches that apply and undo moves on a single state.
+        Any successors or shared data taken from this state are not affected,
+        but the list from getAgentStates() is updated in place.
+        """
+
+        if (self.isOver()):
+            raise RuntimeError("Can't apply moves to a terminal state.")
+
+        if (self._undoStack is None):
+            # Take our own agent list once, after that moves just swap out the changed agents.
+            self._undoStack = []
+            self._resetCopyOnWrite()
+        elif (len(self._undoStack) > 0):
+            # Only the agents from the last move can be owned (and maybe shared by successors).
+            for (index, _) in self._undoStack[-1].agents:
+                self._agentStatesCopied[index] = False
+
+        # Our food is only ever shared through _initSuccessor(), which clears the flag.
+        # The saved capsule list must stay intact though.
+        self._capsulesCopied = False
+
+        record = _UndoRecord(self)
+
+        self._planes = None
+        self._tensor = None
+
+        self._undoRecord = record
+        self._applySuccessorAction(agentIndex, action)
+        self._undoRecord = None
+
+        record.agents = self._changedAgents
+        record.score = self._score - record.score
+        record.hash = self._hash ^ record.hash
+
+        self._undoStack.append(record)
+
+    def undoMove(self):
+        """
+        Take back the most recent move made with `AbstractGameState.applyMove`.
+        """
+
+        if (not self._undoStack):
+            raise RuntimeError('There are no moves to undo.')
+
+        record = self._undoStack.pop()
+
+        # Agents that were copied are owned by this state, and the originals are still shared.
+        for (index, agentState) in record.agents:
+            self._agentStates[index] = agentState
+            self._agentStatesCopied[index] = False
+
+        if (record.eatenKind == _EATEN_FOOD):
+            self._uneatFood(record.eatenCell[0], record.eatenCell[1], record)
+        elif (record.eatenKind == _EATEN_CAPSULE):
+            self._uneatCapsule(record.eatenCell[0], record.eatenCell[1], record)
+
+        self._score -= record.score
+        self._hash ^= record.hash
+        (self._gameover, self._win) = record.flags
+
+        self._lastAgentMoved = record.lastAgentMoved
+        self._lastFoodEaten = record.lastFoodEaten
+        self._lastCapsuleEaten = record.lastCapsuleEaten
+
+        self._planes = record.planes
+        self._tensor = record.tensor
+
     def addScore(self, score):
-        self._hash = None
-        self._score += score
+        self.setScore(self._score + score)
 
     def eatCapsule(self, x, y):
         """
@@ -83,7 +210,10 @@ class AbstractGameState(abc.ABC):
         self._capsules.remove((x, y))
         self._lastCapsuleEaten = (x, y)
 
-        self._hash = None
+        if (self._undoRecord is not None):
+            self._undoRecord.setEaten(_EATEN_CAPSULE, (x, y))
+
+        self._hash ^= self._capsuleKeys[x * self._layout.height + y]
         return True
 
     def eatFood(self, x, y):
@@ -98,17 +228,25 @@ class AbstractGameState(abc.ABC):
             self._food = self._food.copy()
             self._foodCopied = True
 
-        self._food[x][y] = False
+        self._food.set(x, y, False)
         self._lastFoodEaten = (x, y)
 
-        self._hash = None
+        self._numFood -= 1
+        self._foodPositions = self._withoutPosition(self._foodPositions, (x, y))
+
+        if (self._undoRecord is not None):
+            self._undoRecord.setEaten(_EATEN_FOOD, (x, y))
+
+        self._hash ^= self._foodKeys[x * self._layout.height + y]
         return True
 
     def endGame(self, win):
+        self._hash ^= _flagsHash(self._gameover, self._win)
+
         self._gameover = True
         self._win = win
 
-        self._hash = None
+        self._hash ^= _flagsHash(self._gameover, self._win)
 
     def getAgentPosition(self, index):
         """
@@ -144,11 +282,23 @@ class AbstractGameState(abc.ABC):
         Grids can be accessed via list notation.
         So to check if there is food at (x, y), just do something like: food[x][y].
 
-        Callers should favor hasFood() over this, since this will make a copy of the grid.
+        Callers should favor hasFood() or getFoodPositions() over this,
+        since this will make a copy of the grid.
         """
 
         return self._food.copy()
 
+    def getFoodPositions(self):
+        """
+        Returns a list of positions (x, y) of the remaining food.
+        This list is shared with other states, so the caller should not modify it.
+        """
+
+        if (self._foodPositions is None):
+            self._foodPositions = self._food.asList()
+
+        return self._foodPositions
+
     def getHighlightLocations(self):
         return self._highlightLocations
 
@@ -173,6 +323,23 @@ class AbstractGameState(abc.ABC):
     def getLastFoodEaten(self):
         return self._lastFoodEaten
 
+    def getMutableAgentState(self, index):
+        """
+        Get an agent state that is safe to modify.
+        The agent state is copied the first time it is modified in this state,
+        so the parent and sibling states are never affected.
+
+        This is meant for the game rules, agents should use getAgentState().
+        """
+
+        if (not self._agentStatesCopied[index]):
+            oldAgentState = self._agentStates[index]
+            self._agentStates[index] = oldAgentState.copy()
+            self._agentStatesCopied[index] = True
+            self._changedAgents.append((index, oldAgentState))
+
+        return self._agentStates[index]
+
     def getNumAgents(self):
         return len(self._agentStates)
 
@@ -188,7 +355,42 @@ class AbstractGameState(abc.ABC):
         Get the amount of food left on the board.
         """
 
-        return self._food.count()
+        return self._numFood
+
+    def getPlaneNames(self):
+        """
+        Get the names of the planes in `AbstractGameState.getTensor`, in order.
+        See `pacai.core.tensor` for the names.
+        """
+
+        return tensor.BASE_PLANES
+
+    def getPlanes(self):
+        """
+        Get a dict of read-only NumPy planes (indexed `plane[x][y]`) that describe this state,
+        keyed by the names in `AbstractGameState.getPlaneNames`.
+        The walls plane is shared by all states on the same layout,
+        and the rest are built once per state.
+        Requires NumPy.
+        """
+
+        if (self._planes is None):
+            self._planes = self._buildPlanes()
+
+        return self._planes
+
+    def getTensor(self):
+        """
+        Get all the planes of this state stacked into one read-only NumPy array
+        with the shape (number of planes, width, height).
+        The order of the planes is given by `AbstractGameState.getPlaneNames`.
+        Requires NumPy.
+        """
+
+        if (self._tensor is None):
+            self._tensor = tensor.stackPlanes(self.getPlanes(), self.getPlaneNames())
+
+        return self._tensor
 
     def getScore(self):
         return self._score
@@ -217,14 +419,14 @@ class AbstractGameState(abc.ABC):
         Returns true if the location (x, y) has food.
         """
 
-        return self._food[x][y]
+        return self._food.get(x, y)
 
     def hasWall(self, x, y):
         """
         Returns true if (x, y) has a wall, false otherwise.
         """
 
-        return self._layout.walls[x][y]
+        return self._layout.walls.get(x, y)
 
     def isLose(self):
         return self.isOver() and not self._win
@@ -239,25 +441,175 @@ class AbstractGameState(abc.ABC):
         self._highlightLocations = list(locations)
 
     def setScore(self, score):
+        self._hash ^= _scoreHash(self._score) ^ _scoreHash(score)
         self._score = score
-        self._hash = None
 
-    def _initSuccessor(self):
+    def _buildPlanes(self):
         """
-        Get a state that will eventually serve as a successor.
-        Initialize the successor to look like this state.
+        Build the planes for this state.
+        Children with additional planes should extend the result.
+        """
+
+        width = self._layout.getWidth()
+        height = self._layout.getHeight()
+
+        pacmen = []
+        ghosts = []
+        scaredGhosts = []
+
+        for agentState in self._agentStates:
+            if (agentState.isPacman()):
+                pacmen.append(agentState.getPosition())
+            elif (agentState.isScared()):
+                scaredGhosts.append(agentState.getPosition())
+            else:
+                ghosts.append(agentState.getPosition())
+
+        return {
+            tensor.PLANE_WALLS: self._layout.getWallPlane(),
+            tensor.PLANE_FOOD: tensor.bitGridToPlane(self._food),
+            tensor.PLANE_CAPSULES: tensor.positionsToPlane(width, height, self._capsules),
+            tensor.PLANE_PACMAN: tensor.positionsToPlane(width, height, pacmen),
+            tensor.PLANE_GHOSTS: tensor.positionsToPlane(width, height, ghosts),
+            tensor.PLANE_SCARED_GHOSTS: tensor.positionsToPlane(width, height, scaredGhosts),
+        }
+
+    def _computeHash(self):
+        """
+        Compute the full hash of this state from scratch.
+        This is only needed when a state is built,
+        after that the hash is updated as the state changes.
+        """
+
+        height = self._layout.height
+
+        hashCode = _scoreHash(self._score) ^ _flagsHash(self._gameover, self._win)
+
+        for (x, y) in self._food.asList():
+            hashCode ^= self._foodKeys[x * height + y]
+
+        for (x, y) in self._capsules:
+            hashCode ^= self._capsuleKeys[x * height + y]
+
+        for (index, agentState) in enumerate(self._agentStates):
+            hashCode ^= hash((index, agentState))
+
+        return hashCode
+
+    def _rehashAgents(self):
+        """
+        Swap out the hash contribution of any agents that were modified (copied)
+        during the current move.
+        Unmodified agents are still shared, so they are skipped without being hashed.
+        """
+
+        for (index, oldAgentState) in self._changedAgents:
+            self._hash ^= hash((index, oldAgentState)) ^ hash((index, self._agentStates[index]))
+
+    @abc.abstractmethod
+    def _applySuccessorAction(self, agentIndex, action, checkLegal = True):
+        """
+        Apply the action to the context state (self).
+        When checkLegal is False, the caller guarantees that the action is legal.
+        Everything the rules modify must go through the copy on write machinery
+        (e.g. getMutableAgentState(), eatFood()).
+        Children should start with an empty _changedAgents and finish with _rehashAgents().
+        """
+
+        pass
+
+    def _resetCopyOnWrite(self):
+        """
+        Mark all the data in this state as shared,
+        so the next modification of each piece makes a copy first.
+        """
+
+        self._foodCopied = False
+        self._capsulesCopied = False
+
+        self._agentStates = self._agentStates.copy()
+        self._agentStatesCopied = [False] * len(self._agentStates)
+
+    def _getUndoExtra(self):
+        """
+        Any additional (shared) values that children need to undo eating food or capsules.
+        """
+
+        return None
+
+    def _uneatCapsule(self, x, y, record):
+        """
+        Put back a capsule eaten during the move being undone.
+        The capsule list was copied when it was eaten, so the original is still intact.
+        """
+
+        self._capsules = record.capsules
+        self._capsulesCopied = False
+
+    def _uneatFood(self, x, y, record):
+        """
+        Put back food eaten during the move being undone.
+        """
+
+        if (not self._foodCopied):
+            self._food = self._food.copy()
+            self._foodCopied = True
+
+        self._food.set(x, y, True)
+        self._numFood += 1
+        self._foodPositions = record.foodPositions
+
+    @staticmethod
+    def _withoutPosition(positions, position):
+        """
+        Get a new copy of a (possibly not yet built) list of positions without the given position.
+        The list may be shared with other states, so it is never modified in place.
+        """
+
+        if (positions is None):
+            return None
+
+        return [other for other in positions if other != position]
+
+    def _getSuccessorTemplate(self):
+        """
+        Get the fields that successors of this state start with,
+        everything except the agent states (which each successor modifies).
         """
 
         # Start with a shallow copy.
-        successor = copy.copy(self)
-        successor._hash = None
+        template = dict(self.__dict__)
+        template['_undoStack'] = None
+        template['_undoRecord'] = None
+        template['_planes'] = None
+        template['_tensor'] = None
 
         # Leave food and capsules as a shallow copy, but mark them to be copied on write.
-        successor._foodCopied = False
-        successor._capsulesCopied = False
+        template['_foodCopied'] = False
+        template['_capsulesCopied'] = False
+
+        # Our food is now shared too, so undoMove() will not modify it in place.
+        self._foodCopied = False
+
+        return template
+
+    def _initSuccessor(self, template = None):
+        """
+        Get a state that will eventually serve as a successor.
+        Initialize the successor to look like this state.
+        Siblings can pass the same template from _getSuccessorTemplate().
+        """
+
+        if (template is None):
+            template = self._getSuccessorTemplate()
 
-        # Agent states need to be deep copied.
-        successor._agentStates = [agentState.copy() for agentState in self._agentStates]
+        successor = self.__class__.__new__(self.__class__)
+        successor.__dict__.update(template)
+
+        # Agent states are shared too, but each successor needs its own list to swap them in.
+        successor._agentStates = self._agentStates.copy()
+        successor._agentStatesCopied = [False] * len(self._agentStates)
+        successor._changedAgents = []
 
         return successor
 
@@ -288,8 +640,50 @@ class AbstractGameState(abc.ABC):
                 and self._layout == other._layout)
 
     def __hash__(self):
-        if (self._hash is None):
-            self._hash = util.buildHash(self._score, self._gameover, self._win, *self._capsules,
-                self._food, *self._agentStates, self._layout)
-
         return self._hash
+
+_EATEN_FOOD = 'food'
+_EATEN_CAPSULE = 'capsule'
+
+class _UndoRecord(object):
+    """
+    What a single `AbstractGameState.applyMove` changed.
+    Only the deltas are kept: the agents that were copied (with their old states),
+    the food or capsule that was eaten, and the differences in score and hash.
+    """
+
+    __slots__ = ('agents', 'eatenKind', 'eatenCell', 'score', 'hash', 'flags',
+            'lastAgentMoved', 'lastFoodEaten', 'lastCapsuleEaten',
+            'foodPositions', 'capsules', 'extra', 'planes', 'tensor')
+
+    def __init__(self, state):
+        self.agents = None
+        self.eatenKind = None
+        self.eatenCell = None
+
+        # The score and hash become deltas once the move is done.
+        self.score = state._score
+        self.hash = state._hash
+        self.flags = (state._gameover, state._win)
+
+        self.lastAgentMoved = state._lastAgentMoved
+        self.lastFoodEaten = state._lastFoodEaten
+        self.lastCapsuleEaten = state._lastCapsuleEaten
+
+        # Shared references, these are never modified in place.
+        self.foodPositions = state._foodPositions
+        self.capsules = state._capsules
+        self.extra = state._getUndoExtra()
+
+        self.planes = state._planes
+        self.tensor = state._tensor
+
+    def setEaten(self, kind, cell):
+        self.eatenKind = kind
+        self.eatenCell = cell
+
+def _flagsHash(gameover, win):
+    return hash(('gameover', gameover, win))
+
+def _scoreHash(score):
+    return hash(('score', score))
@@ -34,12 +34,26 @@ class Grid:
     def deepCopy(self):
         return self.copy()
 
+    def get(self, x, y):
+        """
+        Get the value at (x, y), the same as grid[x][y].
+        """
+
+        return self._data[x][y]
+
     def getHeight(self):
         return self._height
 
     def getWidth(self):
         return self._width
 
+    def set(self, x, y, value):
+        """
+        Set the value at (x, y), the same as grid[x][y] = value.
+        """
+
+        self._data[x][y] = value
+
     def shallowCopy(self):
         grid = Grid(self._width, self._height)
         grid._data = self._data
@@ -82,3 +96,200 @@ class Grid:
         out = [[str(self._data[x][y])[0] for x in range(self._width)] for y in range(self._height)]
         out.reverse()
         return '\n'.join([''.join(x) for x in out])
+
+class BitGrid:
+    """
+    A 2-dimensional array of booleans backed by a single packed integer.
+    Data is accessed via grid[x][y] just like `Grid`,
+    and the cell (x, y) is stored in bit `x * height + y`.
+
+    Since Python integers are immutable, copying a grid is O(1),
+    and counting, comparing, and hashing only touch the packed words (not every cell).
+    """
+
+    def __init__(self, width, height, initialValue = False):
+        if (not isinstance(initialValue, bool)):
+            raise ValueError('Grids can only contain booleans')
+
+        self._width = width
+        self._height = height
+        self._full = (1 << (width * height)) - 1
+
+        self._bits = 0
+        if (initialValue):
+            self._bits = self._full
+
+    @staticmethod
+    def fromBits(width, height, bits):
+        """
+        Build a grid directly from its packed representation.
+        """
+
+        grid = BitGrid(width, height)
+        grid._bits = bits & grid._full
+        return grid
+
+    def asList(self, key = True):
+        bits = self._bits
+        if (not key):
+            bits = self._full & ~bits
+
+        values = []
+        height = self._height
+
+        while (bits):
+            lowBit = bits & -bits
+            values.append(divmod(lowBit.bit_length() - 1, height))
+            bits ^= lowBit
+
+        return values
+
+    def copy(self):
+        grid = BitGrid.__new__(BitGrid)
+        grid._width = self._width
+        grid._height = self._height
+        grid._full = self._full
+        grid._bits = self._bits
+        return grid
+
+    def count(self, item = True):
+        setCount = bin(self._bits).count('1')
+        if (item):
+            return setCount
+
+        return self._width * self._height - setCount
+
+    def deepCopy(self):
+        return self.copy()
+
+    def get(self, x, y):
+        """
+        Get the value at (x, y) without going through a column.
+        """
+
+        return (self._bits >> (x * self._height + y)) & 1 == 1
+
+    def getBits(self):
+        """
+        Get the packed integer representation of this grid.
+        """
+
+        return self._bits
+
+    def getHeight(self):
+        return self._height
+
+    def getWidth(self):
+        return self._width
+
+    def set(self, x, y, value):
+        """
+        Set the value at (x, y) without going through a column.
+        """
+
+        mask = 1 << (x * self._height + y)
+        if (value):
+            self._bits |= mask
+        else:
+            self._bits &= ~mask
+
+    def shallowCopy(self):
+        """
+        The packed data is immutable, so there is nothing to share between grids.
+        This is the same as `BitGrid.copy`.
+        """
+
+        return self.copy()
+
+    def _cellIndexToPosition(self, index):
+        return divmod(index, self._height)
+
+    def _normalizeColumn(self, x):
+        if (x < 0):
+            x += self._width
+
+        if (not (0 <= x < self._width)):
+            raise IndexError('Grid column out of range: %d' % (x))
+
+        return x
+
+    def __eq__(self, other):
+        if (other is None):
+            return False
+
+        if (isinstance(other, BitGrid)):
+            return (self._bits == other._bits
+                    and self._width == other._width
+                    and self._height == other._height)
+
+        if (self._width != other.getWidth() or self._height != other.getHeight()):
+            return False
+
+        return all(self.get(x, y) == other[x][y]
+                for x in range(self._width) for y in range(self._height))
+
+    def __getitem__(self, x):
+        if (not (0 <= x < self._width)):
+            x = self._normalizeColumn(x)
+
+        return _BitGridColumn(self, x)
+
+    def __hash__(self):
+        return hash(self._bits)
+
+    def __lt__(self, other):
+        return self.__hash__() < other.__hash__()
+
+    def __setitem__(self, x, column):
+        x = self._normalizeColumn(x)
+
+        if (len(column) != self._height):
+            raise ValueError('Column has %d values, expected %d.' % (len(column), self._height))
+
+        for y in range(self._height):
+            self.set(x, y, column[y])
+
+    def __str__(self):
+        out = [[str(self.get(x, y))[0] for x in range(self._width)] for y in range(self._height)]
+        out.reverse()
+        return '\n'.join([''.join(x) for x in out])
+
+class _BitGridColumn:
+    """
+    A view of a single column (fixed x) of a `BitGrid`.
+    Reads and writes go straight through to the grid.
+    """
+
+    __slots__ = ('_grid', '_x')
+
+    def __init__(self, grid, x):
+        self._grid = grid
+        self._x = x
+
+    def _normalizeRow(self, y):
+        height = self._grid._height
+        if (y < 0):
+            y += height
+
+        if (not (0 <= y < height)):
+            raise IndexError('Grid row out of range: %d' % (y))
+
+        return y
+
+    def __getitem__(self, y):
+        grid = self._grid
+        height = grid._height
+
+        if (not (0 <= y < height)):
+            y = self._normalizeRow(y)
+
+        return (grid._bits >> (self._x * height + y)) & 1 == 1
+
+    def __len__(self):
+        return self._grid._height
+
+    def __setitem__(self, y, value):
+        if (not (0 <= y < self._grid._height)):
+            y = self._normalizeRow(y)
+
+        self._grid.set(self._x, y, value)
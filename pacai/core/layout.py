@@ -1,14 +1,23 @@
+import hashlib
 import os
 import random
 
+from pacai.core.actions import Actions
+from pacai.core.directions import Directions
 from pacai.core.distance import manhattan
-from pacai.core.grid import Grid
+from pacai.core.grid import BitGrid
+from pacai.core.mazegraph import MazeGraph
+from pacai.core import tensor
 
 # By default, the layout directory is adjacent to this file.
 DEFAULT_LAYOUT_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'layouts')
 
 GHOST_NUMS = ['1', '2', '3', '4']
 
+# A fixed seed for the Zobrist keys, so hashing never touches the global random state.
+HASH_KEY_SEED = 140
+HASH_KEY_BITS = 64
+
 class Layout(object):
     """
     A Layout manages the static information about the game board.
@@ -17,21 +26,141 @@ class Layout(object):
     def __init__(self, layoutText, maxGhosts = None):
         self.width = len(layoutText[0])
         self.height = len(layoutText)
-        self.walls = Grid(self.width, self.height, initialValue = False)
-        self.food = Grid(self.width, self.height, initialValue = False)
+        self.walls = BitGrid(self.width, self.height, initialValue = False)
+        self.food = BitGrid(self.width, self.height, initialValue = False)
         self.capsules = []
         self.agentPositions = []
         self.numGhosts = 0
         self.layoutText = layoutText
 
+        # Random keys for incremental (Zobrist) hashing of game states, built on first use.
+        self._hashKeys = None
+
+        # Legal actions for each open cell (and ghost legal actions for each heading),
+        # indexed by `x * height + y` and built on first use.
+        self._legalActions = None
+        self._legalGhostActions = None
+
+        # The open cells compiled into a graph, built on first use.
+        self._mazeGraph = None
+        self._fingerprint = None
+
+        # The walls as a (read-only) NumPy plane shared by all states, built on first use.
+        self._wallPlane = None
+
         self.processLayoutText(layoutText, maxGhosts)
 
+    def getFingerprint(self):
+        """
+        Get a fingerprint (hex string) of the shape of this layout.
+        Only the size and walls are used, so layouts that differ only in food, capsules,
+        or agents share a fingerprint (and anything derived from the maze, like distances).
+        """
+
+        if (self._fingerprint is None):
+            numBytes = (self.width * self.height + 7) // 8
+
+            digest = hashlib.sha256()
+            digest.update(('%dx%d:' % (self.width, self.height)).encode())
+            digest.update(self.walls.getBits().to_bytes(numBytes, 'little'))
+
+            self._fingerprint = digest.hexdigest()
+
+        return self._fingerprint
+
+    def getHashKeys(self):
+        """
+        Get the Zobrist keys used to incrementally hash game states on this layout.
+        Returns a tuple of two lists (food keys, capsule keys),
+        each indexed by the cell index `x * height + y`.
+        """
+
+        if (self._hashKeys is None):
+            rng = random.Random(HASH_KEY_SEED)
+            numCells = self.width * self.height
+
+            foodKeys = [rng.getrandbits(HASH_KEY_BITS) for i in range(numCells)]
+            capsuleKeys = [rng.getrandbits(HASH_KEY_BITS) for i in range(numCells)]
+
+            self._hashKeys = (foodKeys, capsuleKeys)
+
+        return self._hashKeys
+
+    def getLegalActions(self, position, direction):
+        """
+        Get the legal actions for an agent at the given position that is facing the given direction.
+        This gives the same answer as `pacai.core.actions.Actions.getPossibleActions`,
+        but is just a lookup into a table that is built once per layout.
+        The returned list belongs to the caller.
+        """
+
+        if (self._legalActions is None):
+            self._buildLegalActions()
+
+        x, y = position
+        xInt, yInt = int(x + 0.5), int(y + 0.5)
+
+        # In between grid points, all agents must continue straight.
+        if (abs(x - xInt) + abs(y - yInt) > Actions.TOLERANCE):
+            return [direction]
+
+        actions = self._legalActions[xInt * self.height + yInt]
+        if (actions is None):
+            return Actions.getPossibleActions(position, direction, self.walls)
+
+        return list(actions)
+
+    def getLegalGhostActions(self, position, direction):
+        """
+        Get the legal actions for a ghost at the given position that is facing the given direction.
+        Ghosts cannot stop, and cannot turn around unless they reach a dead end.
+        Like `Layout.getLegalActions`, this is a lookup and the returned list belongs to the caller.
+        """
+
+        if (self._legalGhostActions is None):
+            self._buildLegalActions()
+
+        x, y = position
+        xInt, yInt = int(x + 0.5), int(y + 0.5)
+
+        if (abs(x - xInt) + abs(y - yInt) > Actions.TOLERANCE):
+            return _ghostActions([direction], direction)
+
+        actions = self._legalGhostActions[xInt * self.height + yInt]
+        if (actions is None):
+            return _ghostActions(Actions.getPossibleActions(position, direction, self.walls),
+                    direction)
+
+        return list(actions[direction])
+
+    def getMazeGraph(self):
+        """
+        Get the open cells of this layout as a `pacai.core.mazegraph.MazeGraph`.
+        The graph is built once and shared, so the caller should not modify it.
+        """
+
+        if (self._mazeGraph is None):
+            self._mazeGraph = MazeGraph(self.walls)
+
+        return self._mazeGraph
+
+    def getWallPlane(self):
+        """
+        Get the walls as a read-only NumPy plane (see `pacai.core.tensor`).
+        The plane is built once and shared by every game state on this layout.
+        """
+
+        if (self._wallPlane is None):
+            self._wallPlane = tensor.bitGridToPlane(self.walls)
+
+        return self._wallPlane
+
     def getNumGhosts(self):
         return self.numGhosts
 
     def isWall(self, pos):
         x, col = pos
-        return self.walls[x][col]
+        return self.walls.get(x, col)
 
     def getHeight(self):
         return self.height
@@ -72,6 +201,48 @@ class Layout(object):
         row, col = [int(x) for x in pacPos]
         return ghostPos in self.visibility[row][col][pacDirection]
 
+    def _buildLegalActions(self):
+        numCells = self.width * self.height
+        self._legalActions = [None] * numCells
+        self._legalGhostActions = [None] * numCells
+
+        for (x, y) in self.walls.asList(False):
+            # Open cells on the edge of the board are left to the (bounds checking) slow path.
+            if (x <= 0 or y <= 0 or x >= self.width - 1 or y >= self.height - 1):
+                continue
+
+            legal = tuple(Actions.getPossibleActions((x, y), Directions.STOP, self.walls))
+
+            ghostLegal = {}
+            for direction in Directions.CARDINAL + [Directions.STOP]:
+                ghostLegal[direction] = tuple(_ghostActions(list(legal), direction))
+
+            self._legalActions[x * self.height + y] = legal
+            self._legalGhostActions[x * self.height + y] = ghostLegal
+
+    def clearDerivedData(self):
+        """
+        Drop everything built from the walls (legal actions, the maze graph, etc.),
+        so it is built again on next use.
+        Call this after changing the walls.
+        """
+
+        self._hashKeys = None
+        self._legalActions = None
+        self._legalGhostActions = None
+        self._mazeGraph = None
+        self._fingerprint = None
+        self._wallPlane = None
+
+    def __getstate__(self):
+        # Derived data is rebuilt on demand, so don't drag it into pickles (e.g. replays).
+        state = self.__dict__.copy()
+        for field in ['_hashKeys', '_legalActions', '_legalGhostActions', '_mazeGraph',
+                '_fingerprint', '_wallPlane']:
+            state[field] = None
+
+        return state
+
     def __str__(self):
         return "\n".join(self.layoutText)
 
@@ -118,6 +289,22 @@ class Layout(object):
             self.agentPositions.append((int(layoutChar), (x, y)))
             self.numGhosts += 1
 
+def _ghostActions(possibleActions, direction):
+    """
+    Narrow down the possible actions to the ones a ghost may take:
+    ghosts cannot stop, and cannot turn around unless they are at a dead end.
+    """
+
+    reverse = Actions.reverseDirection(direction)
+
+    if (Directions.STOP in possibleActions):
+        possibleActions.remove(Directions.STOP)
+
+    if (reverse in possibleActions and len(possibleActions) > 1):
+        possibleActions.remove(reverse)
+
+    return possibleActions
+
 def getLayout(name, layout_dir = DEFAULT_LAYOUT_DIR, maxGhosts = None):
     if (not name.endswith('.lay')):
         name += '.lay'
@@ -0,0 +1,246 @@
+"""
+A compiled, integer-indexed version of the open cells of a maze.
+"""
+
+import array
+
+from pacai.core.actions import Actions
+from pacai.core.directions import Directions
+
+# The order that neighbors are listed in (the same order `pacai.core.actions.Actions` uses).
+NEIGHBOR_DIRECTIONS = [Directions.EAST, Directions.NORTH, Directions.SOUTH, Directions.WEST]
+
+NO_NODE = -1
+
+class MazeGraph(object):
+    """
+    The open (non-wall) cells of a layout, compiled into a graph with dense integer node ids.
+
+    Nodes are numbered 0 to `MazeGraph.numNodes` - 1 in column-major (x, then y) order.
+    Adjacency is stored in compressed sparse row (CSR) form:
+    the neighbors of node i are `neighbors[offsets[i]:offsets[i + 1]]`,
+    and `actions[j]` is the action that moves from node i to `neighbors[j]`.
+
+    All the arrays are flat `array.array`s of ints,
+    so they can be wrapped without a copy by anything that speaks the buffer protocol
+    (e.g. `numpy.frombuffer`).
+    """
+
+    def __init__(self, walls):
+        self.width = walls.getWidth()
+        self.height = walls.getHeight()
+
+        # Position for each node id.
+        self.positions = walls.asList(False)
+        self.numNodes = len(self.positions)
+
+        # Node id for each cell index (x * height + y), NO_NODE for walls.
+        self.cellIds = array.array('i', [NO_NODE]) * (self.width * self.height)
+        for (nodeId, (x, y)) in enumerate(self.positions):
+            self.cellIds[x * self.height + y] = nodeId
+
+        self.offsets = array.array('i', [0])
+        self.neighbors = array.array('i')
+        self.actions = []
+
+        for (x, y) in self.positions:
+            for direction in NEIGHBOR_DIRECTIONS:
+                dx, dy = Actions.directionToVector(direction)
+                neighbor = self.getId((x + int(dx), y + int(dy)))
+
+                if (neighbor != NO_NODE):
+                    self.neighbors.append(neighbor)
+                    self.actions.append(direction)
+
+            self.offsets.append(len(self.neighbors))
+
+    def getActions(self, nodeId):
+        """
+        Get the actions that lead out of the given node,
+        in the same order as `MazeGraph.getNeighbors`.
+        """
+
+        return self.actions[self.offsets[nodeId]:self.offsets[nodeId + 1]]
+
+    def getDegree(self, nodeId):
+        return self.offsets[nodeId + 1] - self.offsets[nodeId]
+
+    def getId(self, position):
+        """
+        Get the node id for an (integer) position,
+        or `NO_NODE` if the position is a wall or is off the board.
+        """
+
+        x, y = position
+        if (x < 0 or y < 0 or x >= self.width or y >= self.height):
+            return NO_NODE
+
+        return self.cellIds[int(x) * self.height + int(y)]
+
+    def getNeighbors(self, nodeId):
+        """
+        Get the ids of the nodes adjacent to the given node.
+        """
+
+        return self.neighbors[self.offsets[nodeId]:self.offsets[nodeId + 1]]
+
+    def getNumNodes(self):
+        return self.numNodes
+
+    def getPosition(self, nodeId):
+        return self.positions[nodeId]
+
+class JunctionGraph(object):
+    """
+    A `MazeGraph` with its corridors contracted away.
+
+    Most cells in a maze are corridor cells (cells with exactly two neighbors).
+    Every other cell is a junction (dead ends and isolated cells count as junctions).
+    A corridor is a chain of corridor cells between two junctions (possibly the same one),
+    and it becomes a single edge between its junctions that is as long as the walk through it.
+    Two adjacent junctions are joined by an edge of length one.
+    A ring of corridor cells with no junction on it gets one of its cells made into a junction.
+
+    Junctions are numbered 0 to `JunctionGraph.numJunctions` - 1.
+    Each cell is reachable from the rest of the maze only through its exits:
+    a junction's only exit is itself (at a distance of zero),
+    and a corridor cell's exits are the two junctions at the ends of its corridor.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        numNodes = graph.getNumNodes()
+
+        # Junction index for each node, NO_NODE for corridor cells.
+        self.junctionIds = array.array('i', [NO_NODE]) * numNodes
+        # Node id for each junction.
+        self.junctions = array.array('i')
+
+        # Corridor id for each node (NO_NODE for junctions),
+        # and how far the cell is from the first end of its corridor.
+        self.corridorIds = array.array('i', [NO_NODE]) * numNodes
+        self.corridorOffsets = array.array('i', [0]) * numNodes
+
+        # For each corridor: the junction at each end, and the length of the walk between them.
+        self.corridorStarts = array.array('i')
+        self.corridorEnds = array.array('i')
+        self.corridorLengths = array.array('i')
+
+        # For each junction: {neighboring junction: length of the shortest edge to it}.
+        self.edges = []
+
+        for node in range(numNodes):
+            if (graph.getDegree(node) != 2):
+                self._addJunction(node)
+
+        for junction in range(len(self.junctions)):
+            self._contractCorridors(junction)
+
+        # Anything left is a ring of corridor cells.
+        for node in range(numNodes):
+            if (self.junctionIds[node] == NO_NODE and self.corridorIds[node] == NO_NODE):
+                self._contractCorridors(self._addJunction(node))
+
+        self.numJunctions = len(self.junctions)
+        self.numCorridors = len(self.corridorLengths)
+
+        # (junction, distance) pairs for each node.
+        self.exits = [None] * numNodes
+        for node in range(numNodes):
+            corridor = self.corridorIds[node]
+            if (corridor == NO_NODE):
+                self.exits[node] = ((self.junctionIds[node], 0),)
+            else:
+                offset = self.corridorOffsets[node]
+                self.exits[node] = (
+                    (self.corridorStarts[corridor], offset),
+                    (self.corridorEnds[corridor], self.corridorLengths[corridor] - offset),
+                )
+
+    def getCorridor(self, nodeId):
+        """
+        Get the corridor id of a node, or `NO_NODE` if the node is a junction.
+        """
+
+        return self.corridorIds[nodeId]
+
+    def getCorridorOffset(self, nodeId):
+        return self.corridorOffsets[nodeId]
+
+    def getEdges(self, junction):
+        """
+        Get a dict of the junctions adjacent to the given junction
+        and the length of the shortest edge to each of them.
+        """
+
+        return self.edges[junction]
+
+    def getExits(self, nodeId):
+        """
+        Get a tuple of (junction, distance) pairs for the junctions
+        that a node can reach the rest of the maze through.
+        """
+
+        return self.exits[nodeId]
+
+    def getJunctionNode(self, junction):
+        return self.junctions[junction]
+
+    def getNumJunctions(self):
+        return self.numJunctions
+
+    def _addEdge(self, junction1, junction2, length):
+        if (junction1 == junction2):
+            return
+
+        for (source, target) in [(junction1, junction2), (junction2, junction1)]:
+            if (length < self.edges[source].get(target, length + 1)):
+                self.edges[source][target] = length
+
+    def _addJunction(self, node):
+        junction = len(self.junctions)
+
+        self.junctionIds[node] = junction
+        self.junctions.append(node)
+        self.edges.append({})
+
+        return junction
+
+    def _contractCorridors(self, junction):
+        """
+        Walk each corridor that leaves the junction (that has not been walked yet),
+        and turn it into an edge.
+        """
+
+        start = self.junctions[junction]
+
+        for neighbor in self.graph.getNeighbors(start):
+            if (self.junctionIds[neighbor] != NO_NODE):
+                self._addEdge(junction, self.junctionIds[neighbor], 1)
+                continue
+
+            if (self.corridorIds[neighbor] != NO_NODE):
+                continue
+
+            corridor = len(self.corridorLengths)
+
+            previous = start
+            current = neighbor
+            length = 0
+
+            while (self.junctionIds[current] == NO_NODE):
+                length += 1
+                self.corridorIds[current] = corridor
+                self.corridorOffsets[current] = length
+
+                first, second = self.graph.getNeighbors(current)
+                previous, current = current, (first if (second == previous) else second)
+
+            length += 1
+            end = self.junctionIds[current]
+
+            self.corridorStarts.append(junction)
+            self.corridorEnds.append(end)
+            self.corridorLengths.append(length)
+
+            self._addEdge(junction, end, length)
@@ -0,0 +1,142 @@
+"""
+Next-hop routing: the first move on a shortest path between any two cells of a maze.
+"""
+
+import array
+
+from pacai.core import distanceCalculator
+from pacai.core.directions import Directions
+from pacai.core.mazegraph import NEIGHBOR_DIRECTIONS
+from pacai.core.mazegraph import NO_NODE
+
+# Each next hop is one of the four neighbor directions, so it fits in two bits.
+HOP_BITS = 2
+HOPS_PER_BYTE = 8 // HOP_BITS
+HOP_MASK = (1 << HOP_BITS) - 1
+
+# The component of nodes that have not been labeled yet.
+NO_COMPONENT = -1
+
+# The tables shared by everything in this process, keyed by layout fingerprint.
+# These are forgotten along with the layout's shared distances.
+nextHopMap = {}
+distanceCalculator.derivedMaps.append(nextHopMap)
+
+class NextHopTable(object):
+    """
+    For every (source, target) pair of open cells in a layout,
+    the first action of a shortest path from the source to the target.
+
+    Hops are packed four to a byte (as indexes into
+    `pacai.core.mazegraph.NEIGHBOR_DIRECTIONS`), with each source's row starting on a new byte.
+    They are derived from the layout's shared `pacai.core.distanceCalculator.DistanceMatrix`:
+    a neighbor of the source is a next hop if it is one step closer to the target.
+    Ties go to the last of the neighbors in `NEIGHBOR_DIRECTIONS` order.
+    Reachability is answered with a component id per node, so lookups never touch the matrix.
+
+    The table itself takes a quarter byte per pair of cells (plus an int per cell),
+    but building it goes through `pacai.core.distanceCalculator.getSharedDistances`.
+    So the full matrix is computed (if it was not already) and stays in the shared registry
+    until `pacai.core.distanceCalculator.clearSharedDistances` is called for the layout.
+
+    Following the next hop until the target is reached walks a shortest path,
+    so chasing (or routing to) anything is a lookup per move.
+    """
+
+    def __init__(self, layout):
+        distances = distanceCalculator.getSharedDistances(layout)
+
+        self.graph = distances.graph
+        self.numNodes = self.graph.getNumNodes()
+        self.rowBytes = -(-self.numNodes // HOPS_PER_BYTE)
+
+        self.hops = bytearray(self.numNodes * self.rowBytes)
+        self.components = array.array('i', [NO_COMPONENT]) * self.numNodes
+
+        numComponents = 0
+        for source in range(self.numNodes):
+            sourceRow = distances.getRow(source).tolist()
+
+            if (self.components[source] == NO_COMPONENT):
+                for (target, distance) in enumerate(sourceRow):
+                    if (distance != distances.unreachable):
+                        self.components[target] = numComponents
+
+                numComponents += 1
+
+            hops = self._computeHops(distances, source, sourceRow)
+
+            # Pad out the last byte of the row.
+            hops += [0] * (self.rowBytes * HOPS_PER_BYTE - self.numNodes)
+
+            start = source * self.rowBytes
+            self.hops[start:(start + self.rowBytes)] = bytes([
+                hops[i] | (hops[i + 1] << 2) | (hops[i + 2] << 4) | (hops[i + 3] << 6)
+                for i in range(0, len(hops), HOPS_PER_BYTE)
+            ])
+
+    def nextHop(self, source, target):
+        """
+        Get the first action on a shortest path from the source position to the target position.
+        Returns `pacai.core.directions.Directions.STOP` if the positions are the same,
+        and None if the target can not be reached.
+        """
+
+        sourceId = self._getIdOrRaise(source)
+        targetId = self._getIdOrRaise(target)
+
+        return self.nextHopById(sourceId, targetId)
+
+    def nextHopById(self, sourceId, targetId):
+        if (sourceId == targetId):
+            return Directions.STOP
+
+        if (self.components[sourceId] != self.components[targetId]):
+            return None
+
+        index = sourceId * self.rowBytes + targetId // HOPS_PER_BYTE
+        hop = (self.hops[index] >> ((targetId % HOPS_PER_BYTE) * HOP_BITS)) & HOP_MASK
+
+        return NEIGHBOR_DIRECTIONS[hop]
+
+    def _computeHops(self, distances, source, sourceRow):
+        """
+        Get the hop (as a direction index) from the source to every node.
+        Targets that are not reachable (and the source itself) get zero.
+        """
+
+        hops = [0] * self.numNodes
+
+        neighbors = self.graph.getNeighbors(source)
+        actions = self.graph.getActions(source)
+
+        for (neighbor, action) in zip(neighbors, actions):
+            hop = NEIGHBOR_DIRECTIONS.index(action)
+
+            # Element-wise iteration over NumPy rows is slow, so work on lists.
+            neighborRow = distances.getRow(neighbor).tolist()
+
+            hops = [(hop if (neighborDistance + 1 == sourceDistance) else oldHop)
+                    for (oldHop, neighborDistance, sourceDistance)
+                    in zip(hops, neighborRow, sourceRow)]
+
+        return hops
+
+    def _getIdOrRaise(self, position):
+        nodeId = self.graph.getId(position)
+        if (nodeId == NO_NODE):
+            raise ValueError('Position is not in the maze: ' + str(position))
+
+        return nodeId
+
+def getSharedNextHops(layout):
+    """
+    Get the `NextHopTable` for a layout that is shared by the whole process
+    (it is only built the first time a maze is seen).
+    """
+
+    fingerprint = layout.getFingerprint()
+    if (fingerprint not in nextHopMap):
+        nextHopMap[fingerprint] = NextHopTable(layout)
+
+    return nextHopMap[fingerprint]
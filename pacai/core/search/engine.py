@@ -0,0 +1,768 @@
+"""
+A reusable graph-search engine that works with any `pacai.core.search.problem.SearchProblem`.
+
+Every search stores its nodes in a `SearchTree`:
+each node is just a state, the index of its parent node, the action from the parent, and its cost.
+Paths are only built (by following the parents back) once a goal is reached,
+so pushing a node is constant time no matter how deep it is.
+"""
+
+import heapq
+
+from pacai.core.actions import Actions
+from pacai.core.directions import Directions
+from pacai.core.search.heuristic import null as nullHeuristic
+from pacai.core.search import position
+from pacai.util.priorityQueue import IndexedPriorityQueue
+from pacai.util.queue import Queue
+from pacai.util.stack import Stack
+
+# The parent of the root node.
+NO_PARENT = -1
+
+# The most search nodes that `memoryBoundedAStarSearch` keeps by default.
+DEFAULT_MAX_NODES = 100000
+
+_VERTICAL_DIRECTIONS = [Directions.NORTH, Directions.SOUTH]
+
+class SearchTree(object):
+    """
+    The nodes generated by a search, stored in parallel lists and referred to by index.
+    """
+
+    def __init__(self):
+        self.states = []
+        self.parents = []
+        self.actions = []
+        self.costs = []
+
+    def addNode(self, state, parent = NO_PARENT, action = None, cost = 0):
+        """
+        Add a node and return its index.
+        """
+
+        self.states.append(state)
+        self.parents.append(parent)
+        self.actions.append(action)
+        self.costs.append(cost)
+
+        return len(self.states) - 1
+
+    def getPath(self, node):
+        """
+        Get the actions that lead from the root to a node.
+        """
+
+        path = []
+        while (self.parents[node] != NO_PARENT):
+            path.append(self.actions[node])
+            node = self.parents[node]
+
+        path.reverse()
+        return path
+
+    def getReversePath(self, node):
+        """
+        Get the actions that lead from a node to the root,
+        in a tree that was searched backwards (from a goal).
+        In those trees, the action of each node leads from that node to its parent.
+        """
+
+        path = []
+        while (self.parents[node] != NO_PARENT):
+            path.append(self.actions[node])
+            node = self.parents[node]
+
+        return path
+
+    def __len__(self):
+        return len(self.states)
+
+def aStarSearch(problem, heuristic = nullHeuristic):
+    """
+    Search the node that has the lowest combined cost and heuristic first.
+    """
+
+    return bestFirstSearch(problem, heuristic)
+
+def bestFirstSearch(problem, heuristic = nullHeuristic):
+    """
+    Search the node with the lowest `cost + heuristic(state, problem)` first.
+    Ties go to the node that was queued first.
+
+    Each state is in the frontier at most once:
+    when a cheaper way to a queued state is found, its priority is lowered in place.
+    """
+
+    tree = SearchTree()
+
+    startState = problem.startingState()
+    frontier = IndexedPriorityQueue()
+    frontier.push(startState, heuristic(startState, problem))
+
+    # The best node found so far for each generated state.
+    bestNodes = {startState: tree.addNode(startState)}
+    expanded = set()
+
+    while (not frontier.isEmpty()):
+        state = frontier.pop()
+        node = bestNodes[state]
+
+        expanded.add(state)
+
+        if (problem.isGoal(state)):
+            return tree.getPath(node)
+
+        cost = tree.costs[node]
+        for (successor, action, stepCost) in problem.successorStates(state):
+            if (successor in expanded):
+                continue
+
+            successorCost = cost + stepCost
+            if (successor in bestNodes and tree.costs[bestNodes[successor]] <= successorCost):
+                continue
+
+            bestNodes[successor] = tree.addNode(successor, node, action, successorCost)
+            frontier.update(successor, successorCost + heuristic(successor, problem))
+
+    return []
+
+def bidirectionalBreadthFirstSearch(problem):
+    """
+    Search the shallowest nodes first, forwards from the start and backwards from the goal,
+    until the two searches meet.
+    Each side only has to search about half as deep,
+    so far fewer states are expanded on open or large layouts.
+
+    This needs a problem with a single known goal (see `SearchProblem.getGoalState`).
+    Other problems just get a `breadthFirstSearch`.
+    """
+
+    goalState = problem.getGoalState()
+    if (goalState is None):
+        return breadthFirstSearch(problem)
+
+    startState = problem.startingState()
+    if (problem.isGoal(startState)):
+        return []
+
+    forward = _SearchSide(startState, problem.successorStates)
+    backward = _SearchSide(goalState, problem.predecessorStates)
+
+    # Each side's layer is the nodes at its current depth (kept in the node costs).
+    forwardLayer = [forward.nodes[startState]]
+    backwardLayer = [backward.nodes[goalState]]
+
+    while (len(forwardLayer) > 0 and len(backwardLayer) > 0):
+        # Grow whichever side has less to expand.
+        if (len(forwardLayer) <= len(backwardLayer)):
+            forwardLayer, meeting = _expandLayer(forward, backward, forwardLayer)
+        else:
+            backwardLayer, meeting = _expandLayer(backward, forward, backwardLayer)
+            if (meeting is not None):
+                meeting = (meeting[1], meeting[0])
+
+        if (meeting is not None):
+            return forward.tree.getPath(meeting[0]) + backward.tree.getReversePath(meeting[1])
+
+    return []
+
+def bidirectionalUniformCostSearch(problem):
+    """
+    Search the node of least total cost first,
+    forwards from the start and backwards from the goal,
+    until no cheaper path than the best one through a meeting state can exist.
+
+    This needs a problem with a single known goal (see `SearchProblem.getGoalState`).
+    Other problems just get a `uniformCostSearch`.
+    """
+
+    goalState = problem.getGoalState()
+    if (goalState is None):
+        return uniformCostSearch(problem)
+
+    startState = problem.startingState()
+    if (problem.isGoal(startState)):
+        return []
+
+    forward = _SearchSide(startState, problem.successorStates)
+    backward = _SearchSide(goalState, problem.predecessorStates)
+
+    # The cheapest path found so far: (cost, forward node, backward node).
+    best = None
+
+    while (not forward.frontier.isEmpty() and not backward.frontier.isEmpty()):
+        forwardCost = forward.frontier.getPriority(forward.frontier.peek())
+        backwardCost = backward.frontier.getPriority(backward.frontier.peek())
+
+        # Any path that has not been seen yet costs at least this much.
+        if (best is not None and forwardCost + backwardCost >= best[0]):
+            break
+
+        side = forward
+        other = backward
+        if (backwardCost < forwardCost):
+            side = backward
+            other = forward
+
+        state = side.frontier.pop()
+        node = side.nodes[state]
+        side.expanded.add(state)
+
+        cost = side.tree.costs[node]
+        for (neighbor, action, stepCost) in side.expand(state):
+            if (neighbor in side.expanded):
+                continue
+
+            neighborCost = cost + stepCost
+            if (neighbor in side.nodes and side.tree.costs[side.nodes[neighbor]] <= neighborCost):
+                continue
+
+            child = side.tree.addNode(neighbor, node, action, neighborCost)
+            side.nodes[neighbor] = child
+            side.frontier.update(neighbor, neighborCost)
+
+            if (neighbor in other.nodes):
+                otherNode = other.nodes[neighbor]
+                totalCost = neighborCost + other.tree.costs[otherNode]
+
+                if (best is None or totalCost < best[0]):
+                    if (side is forward):
+                        best = (totalCost, child, otherNode)
+                    else:
+                        best = (totalCost, otherNode, child)
+
+    if (best is None):
+        return []
+
+    return forward.tree.getPath(best[1]) + backward.tree.getReversePath(best[2])
+
+def breadthFirstSearch(problem):
+    """
+    Search the shallowest nodes in the search tree first.
+
+    States are closed as soon as they are pushed,
+    since the first path found to a state is a shallowest one.
+    """
+
+    tree = SearchTree()
+
+    startState = problem.startingState()
+    frontier = Queue()
+    frontier.push(tree.addNode(startState))
+    closed = {startState}
+
+    while (not frontier.isEmpty()):
+        node = frontier.pop()
+        state = tree.states[node]
+
+        if (problem.isGoal(state)):
+            return tree.getPath(node)
+
+        cost = tree.costs[node]
+        for (successor, action, stepCost) in problem.successorStates(state):
+            if (successor in closed):
+                continue
+
+            closed.add(successor)
+            frontier.push(tree.addNode(successor, node, action, cost + stepCost))
+
+    return []
+
+def depthFirstSearch(problem):
+    """
+    Search the deepest nodes in the search tree first.
+
+    States that have already been expanded are never pushed again,
+    but a state may be on the stack more than once (the newest copy is expanded first),
+    so the search order is a true depth-first order.
+    """
+
+    tree = SearchTree()
+
+    frontier = Stack()
+    frontier.push(tree.addNode(problem.startingState()))
+    expanded = set()
+
+    while (not frontier.isEmpty()):
+        node = frontier.pop()
+        state = tree.states[node]
+
+        if (state in expanded):
+            continue
+
+        expanded.add(state)
+
+        if (problem.isGoal(state)):
+            return tree.getPath(node)
+
+        cost = tree.costs[node]
+        for (successor, action, stepCost) in problem.successorStates(state):
+            if (successor in expanded):
+                continue
+
+            frontier.push(tree.addNode(successor, node, action, cost + stepCost))
+
+    return []
+
+def iterativeDeepeningAStarSearch(problem, heuristic = nullHeuristic):
+    """
+    A series of depth-first searches that each cut off paths whose cost plus heuristic
+    is over a bound, raising the bound to the smallest value that was cut off each time (IDA*).
+
+    Only the current path is stored, so memory use is linear in the length of the path.
+    States are revisited instead of remembered (except for the states on the current path),
+    so this trades time for memory.
+    The path found is optimal if the heuristic is admissible.
+    """
+
+    startState = problem.startingState()
+    if (problem.isGoal(startState)):
+        return []
+
+    bound = heuristic(startState, problem)
+
+    while (True):
+        path, nextBound = _boundedDepthFirstSearch(problem, heuristic, startState, bound)
+        if (path is not None):
+            return path
+
+        if (nextBound == float('inf')):
+            return []
+
+        bound = nextBound
+
+def jumpPointSearch(problem, heuristic = nullHeuristic):
+    """
+    A* search over a 4-connected grid that only expands jump points.
+
+    Open areas have many equally short paths between two cells (that differ only in when they turn).
+    Jump point search only follows the one that makes its vertical moves first,
+    and jumps along straight lines until it reaches a cell where that path could turn
+    (the goal, a cell where a wall beside a horizontal line ends,
+    or a cell on a vertical line that a horizontal jump can continue from).
+    Only those cells are expanded, and the returned path costs the same as A*'s.
+
+    Only the jump points are counted as expanded (see
+    `pacai.core.search.position.PositionSearchProblem.recordExpansion`),
+    the cells scanned along the way while jumping are not.
+
+    This only works for `pacai.core.search.position.PositionSearchProblem`s
+    with a single goal and unit costs.
+    Other problems just get an `aStarSearch`.
+    """
+
+    if (not _isUnitGridProblem(problem)):
+        return aStarSearch(problem, heuristic)
+
+    walls = problem.walls
+    goal = problem.getGoalState()
+
+    startState = problem.startingState()
+    if (problem.isGoal(startState)):
+        return []
+
+    tree = SearchTree()
+
+    # Search states are (position, direction that position was entered with),
+    # since the direction decides which way the search may turn.
+    root = (startState, None)
+    frontier = IndexedPriorityQueue()
+    frontier.push(root, heuristic(startState, problem))
+
+    bestNodes = {root: tree.addNode(root)}
+    expanded = set()
+
+    while (not frontier.isEmpty()):
+        state = frontier.pop()
+        node = bestNodes[state]
+
+        expanded.add(state)
+
+        jumpPosition, direction = state
+        if (problem.isGoal(jumpPosition)):
+            return _getJumpPath(tree, node)
+
+        problem.recordExpansion(jumpPosition)
+
+        cost = tree.costs[node]
+        for jumpDirection in _getJumpDirections(walls, jumpPosition, direction):
+            successorPosition = _jump(walls, goal, jumpPosition, jumpDirection)
+            if (successorPosition is None):
+                continue
+
+            successor = (successorPosition, jumpDirection)
+            if (successor in expanded):
+                continue
+
+            successorCost = cost + (abs(successorPosition[0] - jumpPosition[0])
+                    + abs(successorPosition[1] - jumpPosition[1]))
+            if (successor in bestNodes and tree.costs[bestNodes[successor]] <= successorCost):
+                continue
+
+            bestNodes[successor] = tree.addNode(successor, node, jumpDirection, successorCost)
+            frontier.update(successor, successorCost + heuristic(successorPosition, problem))
+
+    return []
+
+def memoryBoundedAStarSearch(problem, heuristic = nullHeuristic, maxNodes = DEFAULT_MAX_NODES):
+    """
+    A* search that never stores more than `maxNodes` search nodes (SMA*).
+
+    When memory is full, the leaf with the highest f value (cost plus heuristic) is forgotten.
+    Its parent remembers that f value and goes back on the frontier,
+    so the leaf is regenerated if the rest of the search turns out to be worse.
+    The path found is optimal (if the heuristic is admissible)
+    as long as it has fewer than `maxNodes` states.
+    Otherwise, the best path that does fit in memory is found (if there is one).
+    """
+
+    maxNodes = int(maxNodes)
+    inf = float('inf')
+
+    startState = problem.startingState()
+    root = _MemoryNode(startState, None, None, 0, heuristic(startState, problem))
+
+    # The stored node for each state (the cheapest, if a state has been reached more than once).
+    stored = {startState: root}
+    numNodes = 1
+
+    # Ties go to the deepest node.
+    frontier = IndexedPriorityQueue()
+    frontier.push(root, (root.f, 0))
+
+    # Candidates to forget, worst first: (-f, depth, count, node).
+    # Each node has at most one live entry (the one with its current leafCount),
+    # older entries are skipped when popped and dropped whenever the heap is rebuilt.
+    leaves = []
+    leafCount = 0
+
+    while (not frontier.isEmpty()):
+        node = frontier.peek()
+        nodeF = frontier.getPriority(node)[0]
+        if (nodeF == inf):
+            break
+
+        frontier.pop()
+
+        if (problem.isGoal(node.state)):
+            return node.getPath()
+
+        # A node put back for its forgotten children carries their (backed up) f value,
+        # and the regenerated children inherit it so the same ground is not searched again.
+        node.f = max(node.f, nodeF)
+        node.forgottenF = inf
+        for (successor, action, stepCost) in problem.successorStates(node.state):
+            cost = node.cost + stepCost
+
+            existing = stored.get(successor)
+            if (existing is not None and existing.cost <= cost):
+                continue
+
+            # Paths that could never fit in memory are hopeless.
+            if (node.depth + 2 >= maxNodes and not problem.isGoal(successor)):
+                f = inf
+            else:
+                f = max(node.f, cost + heuristic(successor, problem))
+
+            child = _MemoryNode(successor, node, action, cost, f)
+            stored[successor] = child
+            numNodes += 1
+            node.numChildren += 1
+
+            frontier.push(child, (f, -child.depth))
+
+            child.leafCount = leafCount
+            heapq.heappush(leaves, (-f, child.depth, leafCount, child))
+            leafCount += 1
+
+        if (node.numChildren == 0):
+            # A dead end.
+            node.leafCount = leafCount
+            heapq.heappush(leaves, (-inf, node.depth, leafCount, node))
+            leafCount += 1
+
+        while (numNodes > maxNodes and len(leaves) > 0):
+            negativeF, _, count, leaf = heapq.heappop(leaves)
+            if (not _isLiveLeaf(leaf, count) or leaf is root):
+                continue
+
+            leafF = inf
+            if (frontier.contains(leaf)):
+                leafF = frontier.getPriority(leaf)[0]
+                frontier.remove(leaf)
+
+            # Forget the leaf.
+            numNodes -= 1
+            if (stored.get(leaf.state) is leaf):
+                del stored[leaf.state]
+
+            parent = leaf.parent
+            parent.numChildren -= 1
+            parent.forgottenF = min(parent.forgottenF, leafF)
+
+            # Let go of the leaf's state and ancestors, in case something still points at it.
+            leaf.forget()
+
+            if (parent.forgottenF < inf):
+                frontier.update(parent, (parent.forgottenF, -parent.depth))
+
+            if (parent.numChildren == 0):
+                parentF = inf
+                if (frontier.contains(parent)):
+                    parentF = frontier.getPriority(parent)[0]
+
+                parent.leafCount = leafCount
+                heapq.heappush(leaves, (-parentF, parent.depth, leafCount, parent))
+                leafCount += 1
+
+        # Drop the dead entries, so the heap stays within a small multiple of the stored nodes.
+        if (len(leaves) > 2 * numNodes + 1):
+            leaves = [entry for entry in leaves if _isLiveLeaf(entry[3], entry[2])]
+            heapq.heapify(leaves)
+
+    return []
+
+def uniformCostSearch(problem):
+    """
+    Search the node of least total cost first.
+    """
+
+    return bestFirstSearch(problem, nullHeuristic)
+
+class _MemoryNode(object):
+    """
+    A node of a `memoryBoundedAStarSearch`,
+    which (unlike a `SearchTree` node) can be forgotten.
+    """
+
+    __slots__ = ('state', 'parent', 'action', 'cost', 'f', 'depth',
+            'numChildren', 'forgottenF', 'isStored', 'leafCount')
+
+    def __init__(self, state, parent, action, cost, f):
+        self.state = state
+        self.parent = parent
+        self.action = action
+        self.cost = cost
+        self.f = f
+
+        self.depth = 0
+        if (parent is not None):
+            self.depth = parent.depth + 1
+
+        # The number of children that are stored,
+        # and the lowest f value of the children that were forgotten.
+        self.numChildren = 0
+        self.forgottenF = float('inf')
+        self.isStored = True
+
+        # The count of this node's live entry in the search's leaves (if any).
+        self.leafCount = None
+
+    def forget(self):
+        self.isStored = False
+        self.state = None
+        self.parent = None
+        self.leafCount = None
+
+    def getPath(self):
+        path = []
+
+        node = self
+        while (node.parent is not None):
+            path.append(node.action)
+            node = node.parent
+
+        path.reverse()
+        return path
+
+class _SearchSide(object):
+    """
+    One direction of a bidirectional search.
+    """
+
+    def __init__(self, root, expand):
+        self.expand = expand
+        self.tree = SearchTree()
+
+        # The best node for each generated state.
+        self.nodes = {root: self.tree.addNode(root)}
+        self.expanded = set()
+
+        self.frontier = IndexedPriorityQueue()
+        self.frontier.push(root, 0)
+
+def _boundedDepthFirstSearch(problem, heuristic, startState, bound):
+    """
+    One iteration of `iterativeDeepeningAStarSearch`.
+    Returns the path to a goal (or None if none was found within the bound),
+    and the smallest f value that was over the bound.
+    """
+
+    nextBound = float('inf')
+
+    # The current path, and the successors of each state on it that are left to try.
+    states = [startState]
+    actions = []
+    costs = [0]
+    onPath = {startState}
+    successors = [iter(problem.successorStates(startState))]
+
+    while (len(successors) > 0):
+        step = next(successors[-1], None)
+        if (step is None):
+            # Done with this state, back up.
+            successors.pop()
+            onPath.remove(states.pop())
+            costs.pop()
+            if (len(actions) > 0):
+                actions.pop()
+
+            continue
+
+        (successor, action, stepCost) = step
+        if (successor in onPath):
+            continue
+
+        cost = costs[-1] + stepCost
+        f = cost + heuristic(successor, problem)
+        if (f > bound):
+            nextBound = min(nextBound, f)
+            continue
+
+        if (problem.isGoal(successor)):
+            return actions + [action], nextBound
+
+        states.append(successor)
+        actions.append(action)
+        costs.append(cost)
+        onPath.add(successor)
+        successors.append(iter(problem.successorStates(successor)))
+
+    return None, nextBound
+
+def _expandLayer(side, other, layer):
+    """
+    Expand every node in one side's current layer.
+    Returns the next layer, and the (side node, other node) pair
+    where the sides meet with the fewest total steps (or None if they do not meet yet).
+    """
+
+    tree = side.tree
+    nodes = side.nodes
+
+    nextLayer = []
+    meeting = None
+    meetingDepth = None
+
+    for node in layer:
+        depth = tree.costs[node] + 1
+
+        for (neighbor, action, stepCost) in side.expand(tree.states[node]):
+            if (neighbor in nodes):
+                continue
+
+            child = tree.addNode(neighbor, node, action, depth)
+            nodes[neighbor] = child
+            nextLayer.append(child)
+
+            if (neighbor in other.nodes):
+                otherNode = other.nodes[neighbor]
+                totalDepth = depth + other.tree.costs[otherNode]
+
+                if (meeting is None or totalDepth < meetingDepth):
+                    meeting = (child, otherNode)
+                    meetingDepth = totalDepth
+
+    return nextLayer, meeting
+
+def _getJumpDirections(walls, jumpPosition, direction):
+    """
+    Get the directions a jump point search may leave a position in,
+    given the direction that it entered the position with.
+    """
+
+    if (direction is None):
+        return Directions.CARDINAL
+
+    # Vertical lines may turn anywhere.
+    if (direction in _VERTICAL_DIRECTIONS):
+        return [direction, Directions.EAST, Directions.WEST]
+
+    # Horizontal lines only turn where the cell behind the turn is a wall
+    # (otherwise, turning one cell sooner would have been the vertical-first path).
+    x, y = jumpPosition
+    dx, _ = _getVector(direction)
+
+    directions = [direction]
+    for vertical in _VERTICAL_DIRECTIONS:
+        _, dy = _getVector(vertical)
+        if (not walls.get(x, y + dy) and walls.get(x - dx, y + dy)):
+            directions.append(vertical)
+
+    return directions
+
+def _getJumpPath(tree, node):
+    """
+    Get the actions that lead from the root to a node of a jump point search,
+    where each node's action is repeated for the length of its jump.
+    """
+
+    path = []
+    while (tree.parents[node] != NO_PARENT):
+        parent = tree.parents[node]
+        path += [tree.actions[node]] * (tree.costs[node] - tree.costs[parent])
+        node = parent
+
+    path.reverse()
+    return path
+
+def _getVector(direction):
+    dx, dy = Actions.directionToVector(direction)
+    return int(dx), int(dy)
+
+def _isLiveLeaf(node, count):
+    """
+    Check if an entry in a `memoryBoundedAStarSearch`'s leaves can still be forgotten:
+    it is the node's latest entry, and the node is stored without any stored children.
+    """
+
+    return (node.isStored and node.leafCount == count and node.numChildren == 0)
+
+def _isUnitGridProblem(problem):
+    return (isinstance(problem, position.PositionSearchProblem)
+            and problem.getGoalState() is not None
+            and problem.costFn is position.DEFAULT_COST_FUNCTION)
+
+def _jump(walls, goal, jumpPosition, direction):
+    """
+    Move in a straight line from a position until reaching a jump point.
+    Returns the jump point, or None if a wall is hit first.
+    """
+
+    x, y = jumpPosition
+    dx, dy = _getVector(direction)
+
+    # Read cells directly, this loop scans a lot of them.
+    isWall = walls.get
+
+    while (True):
+        x += dx
+        y += dy
+
+        if (isWall(x, y)):
+            return None
+
+        if ((x, y) == goal):
+            return (x, y)
+
+        if (dy == 0):
+            # Stop where a wall beside the line ends, the line can turn there.
+            if ((not isWall(x, y + 1) and isWall(x - dx, y + 1))
+                    or (not isWall(x, y - 1) and isWall(x - dx, y - 1))):
+                return (x, y)
+        else:
+            # Stop where a horizontal jump would find something.
+            if (_jump(walls, goal, (x, y), Directions.EAST) is not None
+                    or _jump(walls, goal, (x, y), Directions.WEST) is not None):
+                return (x, y)
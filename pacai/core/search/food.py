@@ -38,9 +38,9 @@ class FoodSearchProblem(SearchProblem):
             x, y = state[0]
             dx, dy = Actions.directionToVector(direction)
             nextx, nexty = int(x + dx), int(y + dy)
-            if not self.walls[nextx][nexty]:
+            if not self.walls.get(nextx, nexty):
                 nextFood = state[1].copy()
-                nextFood[nextx][nexty] = False
+                nextFood.set(nextx, nexty, False)
                 successors.append((((nextx, nexty), nextFood), direction, 1))
 
         return successors
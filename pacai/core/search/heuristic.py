@@ -3,7 +3,14 @@ A heuristic function estimates the cost from the current state to the nearest
 goal in the provided `pacai.core.search.problem.SearchProblem`.
 """
 
+import collections
+
 from pacai.core import distance
+from pacai.core import distanceCalculator
+from pacai.core.grid import BitGrid
+
+# The most spanning tree weights that `foodMST` remembers for a single problem.
+MST_CACHE_SIZE = 100000
 
 def null(state, problem = None):
     """
@@ -12,6 +19,52 @@ def null(state, problem = None):
 
     return 0
 
+def foodMST(state, problem):
+    """
+    This heuristic is the maze distance to the nearest food,
+    plus the weight of a minimum spanning tree over the remaining food
+    (where edges are maze distances).
+    Any path that eats all the food reaches some food first and then connects the rest of it,
+    so this never overestimates (and it is consistent).
+
+    It works on `pacai.core.search.food.FoodSearchProblem` states.
+    Maze distances come from the layout's shared `pacai.core.distanceCalculator.DistanceMatrix`,
+    and tree weights are memoized in `problem.heuristicInfo` by the set of remaining food
+    (many search states have the same food).
+    """
+
+    position, foodGrid = state
+
+    foodList = foodGrid.asList()
+    if (len(foodList) == 0):
+        return 0
+
+    if ('mazeDistances' not in problem.heuristicInfo):
+        layout = problem.startingGameState.getInitialLayout()
+        problem.heuristicInfo['mazeDistances'] = distanceCalculator.getSharedDistances(layout)
+        problem.heuristicInfo['mstWeights'] = collections.OrderedDict()
+
+    distances = problem.heuristicInfo['mazeDistances']
+    weights = problem.heuristicInfo['mstWeights']
+
+    foodIds = [distances.graph.getId(food) for food in foodList]
+
+    positionRow = distances.getRow(distances.graph.getId(position))
+    nearest = min(int(positionRow[foodId]) for foodId in foodIds)
+
+    key = _getFoodKey(foodGrid)
+    weight = weights.get(key)
+    if (weight is None):
+        weight = _getSpanningTreeWeight(distances, foodIds)
+
+        weights[key] = weight
+        while (len(weights) > MST_CACHE_SIZE):
+            weights.popitem(last = False)
+    else:
+        weights.move_to_end(key)
+
+    return nearest + weight
+
 def manhattan(position, problem):
     """
     This heuristic is the manhattan distance to the goal.
@@ -38,3 +91,33 @@ def numFood(state, problem):
     """
 
     return state[1].count()
+
+def _getFoodKey(foodGrid):
+    if (isinstance(foodGrid, BitGrid)):
+        return foodGrid.getBits()
+
+    return tuple(foodGrid.asList())
+
+def _getSpanningTreeWeight(distances, nodeIds):
+    """
+    Get the weight of a minimum spanning tree over the given nodes (Prim's algorithm),
+    where the edge weights are the distances between the nodes.
+    """
+
+    # The distance from each node not yet in the tree to the tree.
+    first = nodeIds[0]
+    firstRow = distances.getRow(first)
+    remaining = {nodeId: int(firstRow[nodeId]) for nodeId in nodeIds[1:]}
+
+    weight = 0
+    while (len(remaining) > 0):
+        nodeId = min(remaining, key = remaining.get)
+        weight += remaining.pop(nodeId)
+
+        row = distances.getRow(nodeId)
+        for (otherId, otherDistance) in remaining.items():
+            newDistance = int(row[otherId])
+            if (newDistance < otherDistance):
+                remaining[otherId] = newDistance
+
+    return weight
@@ -34,6 +34,37 @@ class PositionSearchProblem(SearchProblem):
         if (self.startState is None):
             raise ValueError("Could not find starting location.")
 
+    def getGoalState(self):
+        # Subclasses that change the goal test or the moves (e.g. to look for any food)
+        # do not have a single goal that can be searched backwards from.
+        if (type(self).isGoal is not PositionSearchProblem.isGoal
+                or type(self).successorStates is not PositionSearchProblem.successorStates):
+            return None
+
+        return self.goal
+
+    def predecessorStates(self, state):
+        """
+        Returns the states that lead to this one, the actions they require,
+        and the cost of moving into this state.
+        Moves are reversible, so these are the same positions as the successors.
+        """
+
+        predecessors = []
+        cost = self.costFn(state)
+
+        for action in Directions.CARDINAL:
+            x, y = state
+            dx, dy = Actions.directionToVector(action)
+            prevx, prevy = int(x - dx), int(y - dy)
+
+            if (not self.walls.get(prevx, prevy)):
+                predecessors.append(((prevx, prevy), action, cost))
+
+        self.recordExpansion(state)
+
+        return predecessors
+
     def startingState(self):
         return self.startState
 
@@ -63,20 +94,13 @@ class PositionSearchProblem(SearchProblem):
             dx, dy = Actions.directionToVector(action)
             nextx, nexty = int(x + dx), int(y + dy)
 
-            if (not self.walls[nextx][nexty]):
+            if (not self.walls.get(nextx, nexty)):
                 nextState = (nextx, nexty)
                 cost = self.costFn(nextState)
 
                 successors.append((nextState, action, cost))
 
-        # Bookkeeping for display purposes (the highlight in the GUI).
-        self._numExpanded += 1
-        if (state not in self._visitedLocations):
-            self._visitedLocations.add(state)
-            # Note: visit history requires coordinates not states. In this situation
-            # they are equivalent.
-            coordinates = state
-            self._visitHistory.append(coordinates)
+        self.recordExpansion(state)
 
         return successors
 
@@ -102,3 +126,19 @@ class PositionSearchProblem(SearchProblem):
             cost += self.costFn((x, y))
 
         return cost
+
+    def recordExpansion(self, state):
+        """
+        Count an expansion of a state, and record the visit for the GUI's highlight.
+        Searches that read the walls directly (instead of calling `successorStates`)
+        should call this for each state they expand.
+        """
+
+        # Bookkeeping for display purposes (the highlight in the GUI).
+        self._numExpanded += 1
+        if (state not in self._visitedLocations):
+            self._visitedLocations.add(state)
+            # Note: visit history requires coordinates not states. In this situation
+            # they are equivalent.
+            coordinates = state
+            self._visitHistory.append(coordinates)
@@ -46,6 +46,18 @@ class SearchProblem(abc.ABC):
     def getExpandedCount(self):
         return self._numExpanded
 
+    def getGoalState(self):
+        """
+        Get the one and only goal state, if this problem has a single goal that is known up front.
+        Otherwise, returns None.
+
+        This lets a search also work backwards from the goal
+        (see `pacai.core.search.engine.bidirectionalBreadthFirstSearch`),
+        so problems that give a goal here must also implement `SearchProblem.predecessorStates`.
+        """
+
+        return None
+
     def getVisitHistory(self):
         return self._visitHistory
 
@@ -60,6 +72,20 @@ class SearchProblem(abc.ABC):
 
         pass
 
+    def predecessorStates(self, state):
+        """
+        Answers the question:
+        What moves lead to this state?
+
+        Returns a list of tuples with three values:
+        (predecessor state, action from the predecessor to this state, cost of the action).
+
+        Only problems with a single known goal (see `SearchProblem.getGoalState`)
+        need to answer this.
+        """
+
+        raise NotImplementedError("This problem can not be searched backwards.")
+
     @abc.abstractmethod
     def startingState(self):
         """
@@ -0,0 +1,131 @@
+"""
+Encode game states as stacks of NumPy planes (one `width` x `height` array per kind of object),
+so learning agents can compute features and run models over whole boards at once.
+
+NumPy is an optional dependency of pacai.
+It is only imported the first time an encoding is built (so importing game states stays cheap),
+and the functions here raise a `RuntimeError` when it is not installed.
+
+All planes are indexed like the grids, i.e. `plane[x][y]`.
+The planes and tensors given out are read-only, since they are cached and shared.
+"""
+
+PLANE_WALLS = 'walls'
+PLANE_FOOD = 'food'
+PLANE_CAPSULES = 'capsules'
+PLANE_PACMAN = 'pacman'
+PLANE_GHOSTS = 'ghosts'
+PLANE_SCARED_GHOSTS = 'scaredGhosts'
+
+# Capture only.
+PLANE_RED_TEAM = 'redTeam'
+PLANE_BLUE_TEAM = 'blueTeam'
+PLANE_RED_SIDE = 'redSide'
+
+BASE_PLANES = [
+    PLANE_WALLS,
+    PLANE_FOOD,
+    PLANE_CAPSULES,
+    PLANE_PACMAN,
+    PLANE_GHOSTS,
+    PLANE_SCARED_GHOSTS,
+]
+
+CAPTURE_PLANES = BASE_PLANES + [
+    PLANE_RED_TEAM,
+    PLANE_BLUE_TEAM,
+    PLANE_RED_SIDE,
+]
+
+PLANE_DTYPE = 'uint8'
+
+# The NumPy module, once it has been imported (see requireNumpy()).
+_numpy = None
+
+def bitGridToPlane(grid):
+    """
+    Convert a `pacai.core.grid.BitGrid` into a plane.
+    """
+
+    numpy = requireNumpy()
+
+    width = grid.getWidth()
+    height = grid.getHeight()
+    numCells = width * height
+
+    # Bit `x * height + y` of the grid is cell (x, y), so the unpacked bits are already in order.
+    packed = grid.getBits().to_bytes((numCells + 7) // 8, 'little')
+    bits = numpy.unpackbits(numpy.frombuffer(packed, dtype = numpy.uint8), count = numCells,
+            bitorder = 'little')
+
+    return _readOnly(bits.reshape((width, height)))
+
+def columnsToPlane(width, height, start, end):
+    """
+    Build a plane with ones in the columns [start, end) (e.g. one side of a capture board).
+    """
+
+    plane = emptyPlane(width, height)
+    plane[start:end] = 1
+
+    return _readOnly(plane)
+
+def emptyPlane(width, height):
+    numpy = requireNumpy()
+
+    return numpy.zeros((width, height), dtype = PLANE_DTYPE)
+
+def hasNumpy():
+    try:
+        requireNumpy()
+    except RuntimeError:
+        return False
+
+    return True
+
+def positionsToPlane(width, height, positions):
+    """
+    Build a plane with a one at each of the given positions.
+    Agents in between cells are placed at their nearest cell.
+    """
+
+    plane = emptyPlane(width, height)
+
+    for position in positions:
+        if (position is None):
+            continue
+
+        x, y = position
+        plane[int(x + 0.5)][int(y + 0.5)] = 1
+
+    return _readOnly(plane)
+
+def requireNumpy():
+    """
+    Get the NumPy module, importing it the first time.
+    """
+
+    global _numpy
+
+    if (_numpy is None):
+        try:
+            import numpy
+        except ImportError:
+            raise RuntimeError('NumPy is required for tensor encodings, but it is not installed.')
+
+        _numpy = numpy
+
+    return _numpy
+
+def stackPlanes(planes, names):
+    """
+    Stack the named planes into a single (len(names), width, height) tensor.
+    """
+
+    numpy = requireNumpy()
+
+    return _readOnly(numpy.stack([planes[name] for name in names]))
+
+def _readOnly(array):
+    array.flags.writeable = False
+    return array
@@ -2,6 +2,7 @@ import random
 
 from pacai.agents.base import BaseAgent
 from pacai.agents.search.multiagent import MultiAgentSearchAgent
+from pacai.agents.search.multiagent import TranspositionTable
 from pacai.core.distance import manhattan
 
 class ReflexAgent(BaseAgent):
@@ -134,16 +135,23 @@ class MinimaxAgent(MultiAgentSearchAgent):
         """
         Returns the minimax action from the current gameState.
         """
+        table = self.getTranspositionTable()
+
         def minimax(state, depth, agentIndex):
             if depth == 0 or state.isWin() or state.isLose():
-                return (self.getEvaluationFunction()(state), None)
+                return (self.evaluate(state), None)
+
+            # Reuse the result if this position was already searched (this turn or earlier)
+            entry = table.get(state, depth, agentIndex)
+            if entry is not None:
+                return (entry.value, entry.action)
             
             # Get the legal moves
             legalMoves = state.getLegalActions(agentIndex)
             if agentIndex == 0:  # Pacman's turn (maximizing)
                 legalMoves = [a for a in legalMoves if a != 'Stop']
             if not legalMoves:
-                return (self.getEvaluationFunction()(state), None)
+                return (self.evaluate(state), None)
             
             # Gets the best score
             if agentIndex == 0:
@@ -157,8 +165,7 @@ class MinimaxAgent(MultiAgentSearchAgent):
             nextDepth = depth - 1 if nextAgent == 0 else depth
             
             # Evaluation of the best move
-            for action in legalMoves:
-                successor = state.generateSuccessor(agentIndex, action)
+            for action, successor in state.generateSuccessors(agentIndex, legalMoves):
                 score, _ = minimax(successor, nextDepth, nextAgent)
                 
                 if agentIndex == 0:
@@ -170,6 +177,7 @@ class MinimaxAgent(MultiAgentSearchAgent):
                         bestScore = score
                         bestAction = action
             
+            table.put(state, depth, agentIndex, bestScore, action = bestAction)
             return (bestScore, bestAction)
         
         result = minimax(gameState, self.getTreeDepth(), 0)
@@ -194,16 +202,31 @@ class AlphaBetaAgent(MultiAgentSearchAgent):
         """
         Returns the minimax action using alpha-beta pruning.
         """
+        table = self.getTranspositionTable()
+
         def alphaBeta(state, depth, agentIndex, alpha, beta):
             if depth == 0 or state.isWin() or state.isLose():
-                return (self.getEvaluationFunction()(state), None)
+                return (self.evaluate(state), None)
             
             legalMoves = state.getLegalActions(agentIndex)
             if agentIndex == 0:
                 legalMoves = [a for a in legalMoves if a != 'Stop']
             
             if not legalMoves:
-                return (self.getEvaluationFunction()(state), None)
+                return (self.evaluate(state), None)
+
+            # A stored result may settle this node, otherwise try its best move first
+            entry = table.get(state, depth, agentIndex)
+            if entry is not None:
+                if entry.isCutoff(alpha, beta):
+                    return (entry.value, entry.action)
+
+                if entry.action in legalMoves:
+                    legalMoves.remove(entry.action)
+                    legalMoves.insert(0, entry.action)
+
+            originalAlpha = alpha
+            originalBeta = beta
             
             nextAgent = (agentIndex + 1) % state.getNumAgents()
             nextDepth = depth - 1 if nextAgent == 0 else depth
@@ -221,7 +244,6 @@ class AlphaBetaAgent(MultiAgentSearchAgent):
                     alpha = max(alpha, value)
                     if alpha > beta:
                         break
-                return (value, bestAction)
             else:
                 value = float('inf')
                 for action in legalMoves:
@@ -233,7 +255,10 @@ class AlphaBetaAgent(MultiAgentSearchAgent):
                     beta = min(beta, value)
                     if beta < alpha:
                         break
-                return (value, bestAction)
+
+            bound = TranspositionTable.boundFor(value, originalAlpha, originalBeta)
+            table.put(state, depth, agentIndex, value, bound, bestAction)
+            return (value, bestAction)
         
         result = alphaBeta(gameState, self.getTreeDepth(), 0, float('-inf'), float('inf'))
         best_action = result[1]
@@ -260,16 +285,23 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
         """
         Returns the expectimax action using self.getTreeDepth() and self.getEvaluationFunction().
         """
+        table = self.getTranspositionTable()
+
         def expectimax(state, depth, agentIndex):
             if depth == 0 or state.isWin() or state.isLose():
-                return (self.getEvaluationFunction()(state), None)
+                return (self.evaluate(state), None)
+
+            # Expected values are always exact, so any stored result can be reused
+            entry = table.get(state, depth, agentIndex)
+            if entry is not None:
+                return (entry.value, entry.action)
             
             legalMoves = state.getLegalActions(agentIndex)
             if agentIndex == 0:
                 legalMoves = [a for a in legalMoves if a != 'Stop']
             
             if not legalMoves:
-                return (self.getEvaluationFunction()(state), None)
+                return (self.evaluate(state), None)
             
             nextAgent = (agentIndex + 1) % state.getNumAgents()
             nextDepth = depth - 1 if nextAgent == 0 else depth
@@ -307,6 +339,8 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
                     if score > bestScore:
                         bestScore = score
                         bestAction = action
+
+                table.put(state, depth, agentIndex, bestScore, action = bestAction)
                 return (bestScore, bestAction)
             else:
                 totalScore = 0
@@ -315,6 +349,8 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
                     successor = state.generateSuccessor(agentIndex, action)
                     score, _ = expectimax(successor, nextDepth, nextAgent)
                     totalScore += score * probability
+
+                table.put(state, depth, agentIndex, totalScore, action = legalMoves[0])
                 return (totalScore, legalMoves[0])
         
         bestScore, bestAction = expectimax(gameState, self.getTreeDepth(), 0)
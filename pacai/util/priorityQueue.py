@@ -4,6 +4,9 @@ Priority queue containers.
 
 import heapq
 
+# The position of an item that is not in an `IndexedPriorityQueue`.
+NOT_QUEUED = -1
+
 class PriorityQueue(object):
     """
     Implements a priority queue data structure.
@@ -13,17 +16,24 @@ class PriorityQueue(object):
 
     Note that this PriorityQueue does not allow you to change the priority of an item.
     However, you may insert the same item multiple times with different priorities.
+    (See `IndexedPriorityQueue` for a queue that can change priorities.)
+
+    Items with the same priority are popped in the order they were pushed,
+    so the items themselves are never compared.
     """
 
     def __init__(self):
         self.heap = []
+        self._count = 0
 
     def push(self, item, priority):
-        pair = (priority, item)
-        heapq.heappush(self.heap, pair)
+        entry = (priority, self._count, item)
+        self._count += 1
+
+        heapq.heappush(self.heap, entry)
 
     def pop(self):
-        (priority, item) = heapq.heappop(self.heap)
+        (priority, count, item) = heapq.heappop(self.heap)
         return item
 
     def isEmpty(self):
@@ -56,3 +66,189 @@ class PriorityQueueWithFunction(PriorityQueue):
 
     def __len__(self):
         return len(self.heap)
+
+class IndexedPriorityQueue(object):
+    """
+    A priority queue that keeps track of where each of its items is in the heap,
+    so it can check for an item and change an item's priority in O(log n).
+    Unlike `PriorityQueue`, each item can only be in the queue once,
+    so searches can lower a state's priority instead of pushing it again.
+
+    Items with the same priority are popped in the order they were pushed (or last updated),
+    so the items themselves are never compared (they only need to be hashable).
+
+    If every item is an integer in [0, `maxItems`)
+    (e.g. the node ids of a `pacai.core.mazegraph.MazeGraph`),
+    pass `maxItems` to track the items in a list instead of a dict.
+    """
+
+    def __init__(self, maxItems = None):
+        self.heap = []
+        self._count = 0
+
+        self._isIndexed = (maxItems is not None)
+        if (self._isIndexed):
+            self._positions = [NOT_QUEUED] * maxItems
+        else:
+            self._positions = {}
+
+    def contains(self, item):
+        return self._getPosition(item) != NOT_QUEUED
+
+    def getPriority(self, item):
+        """
+        Get the priority of an item in the queue.
+        Raises a `KeyError` if the item is not in the queue.
+        """
+
+        position = self._getPosition(item)
+        if (position == NOT_QUEUED):
+            raise KeyError('Item is not in the queue: ' + str(item))
+
+        return self.heap[position][0]
+
+    def isEmpty(self):
+        return len(self.heap) == 0
+
+    def peek(self):
+        """
+        Get the item with the lowest priority, without removing it.
+        """
+
+        return self.heap[0][2]
+
+    def pop(self):
+        """
+        Remove and return the item with the lowest priority.
+        """
+
+        heap = self.heap
+
+        top = heap[0]
+        last = heap.pop()
+
+        if (len(heap) > 0):
+            heap[0] = last
+            self._siftDown(0)
+
+        self._clearPosition(top[2])
+        return top[2]
+
+    def push(self, item, priority):
+        """
+        Add an item that is not already in the queue.
+        Raises a `ValueError` if the item is already in the queue.
+        """
+
+        if (self.contains(item)):
+            raise ValueError('Item is already in the queue: ' + str(item))
+
+        self.heap.append(self._makeEntry(item, priority))
+        self._siftUp(len(self.heap) - 1)
+
+    def remove(self, item):
+        """
+        Remove an item from the queue.
+        Raises a `KeyError` if the item is not in the queue.
+        """
+
+        position = self._getPosition(item)
+        if (position == NOT_QUEUED):
+            raise KeyError('Item is not in the queue: ' + str(item))
+
+        heap = self.heap
+        last = heap.pop()
+        self._clearPosition(item)
+
+        if (position < len(heap)):
+            heap[position] = last
+            self._siftUp(position)
+            self._siftDown(self._positions[last[2]])
+
+    def update(self, item, priority):
+        """
+        Lower the priority of an item (decrease-key).
+        If the item is not in the queue, then it is pushed.
+        If the item is already in the queue with an equal or lower priority, nothing is changed.
+
+        Returns True if the item was pushed or its priority was changed.
+        """
+
+        position = self._getPosition(item)
+        if (position == NOT_QUEUED):
+            self.push(item, priority)
+            return True
+
+        if (self.heap[position][0] <= priority):
+            return False
+
+        self.heap[position] = self._makeEntry(item, priority)
+        self._siftUp(position)
+
+        return True
+
+    def _clearPosition(self, item):
+        if (self._isIndexed):
+            self._positions[item] = NOT_QUEUED
+        else:
+            del self._positions[item]
+
+    def _getPosition(self, item):
+        if (self._isIndexed):
+            return self._positions[item]
+
+        return self._positions.get(item, NOT_QUEUED)
+
+    def _makeEntry(self, item, priority):
+        entry = (priority, self._count, item)
+        self._count += 1
+
+        return entry
+
+    def _siftDown(self, position):
+        heap = self.heap
+        positions = self._positions
+        size = len(heap)
+        entry = heap[position]
+
+        while (True):
+            child = 2 * position + 1
+            if (child >= size):
+                break
+
+            # Entries never tie, since every entry has a different count.
+            if (child + 1 < size and heap[child + 1] < heap[child]):
+                child += 1
+
+            if (not (heap[child] < entry)):
+                break
+
+            heap[position] = heap[child]
+            positions[heap[position][2]] = position
+            position = child
+
+        heap[position] = entry
+        positions[entry[2]] = position
+
+    def _siftUp(self, position):
+        heap = self.heap
+        positions = self._positions
+        entry = heap[position]
+
+        while (position > 0):
+            parent = (position - 1) // 2
+            if (not (entry < heap[parent])):
+                break
+
+            heap[position] = heap[parent]
+            positions[heap[position][2]] = position
+            position = parent
+
+        heap[position] = entry
+        positions[entry[2]] = position
+
+    def __contains__(self, item):
+        return self.contains(item)
+
+    def __len__(self):
+        return len(self.heap)
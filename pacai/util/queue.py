@@ -2,20 +2,23 @@
 A queue container data structure.
 """
 
+import collections
+
 class Queue(object):
     """
     A container with a first-in-first-out (FIFO) queuing policy.
+    Pushing and popping are both constant time.
     """
 
     def __init__(self):
-        self.list = []
+        self.list = collections.deque()
 
     def push(self, item):
         """
         Enqueue the item into the queue.
         """
 
-        self.list.insert(0, item)
+        self.list.append(item)
 
     def pop(self):
         """
@@ -23,7 +26,7 @@ class Queue(object):
         This operation removes the item from the queue.
         """
 
-        return self.list.pop()
+        return self.list.popleft()
 
     def isEmpty(self):
         """
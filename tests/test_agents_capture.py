@@ -0,0 +1,46 @@
+import unittest
+
+from pacai.agents.capture.offense import OffensiveReflexAgent
+from pacai.bin.capture import CaptureGameState
+from pacai.core import distanceCalculator
+from pacai.core.directions import Directions
+from pacai.core.layout import Layout
+
+# Red (agent 0) is one step away from blue's side, and then right next to blue's food.
+EATING_LAYOUT = [
+    '%%%%%%%%%%',
+    '%   1 . .%',
+    '%      2 %',
+    '%%%%%%%%%%',
+]
+
+class OffensiveReflexAgentTest(unittest.TestCase):
+    def test_eating_move(self):
+        layout = Layout(EATING_LAYOUT)
+
+        # Cross over to blue's side (as a pacman).
+        state = CaptureGameState(layout, 100).generateSuccessor(0, Directions.EAST)
+
+        agent = OffensiveReflexAgent(0)
+        agent.registerInitialState(state)
+        agent.updateFoodField(state)
+
+        distances = distanceCalculator.getSharedDistances(layout)
+
+        for action in [Directions.EAST, Directions.WEST]:
+            successor = agent.getSuccessor(state, action)
+            position = successor.getAgentState(0).getPosition()
+
+            # The distance to the nearest food that is left after the move.
+            expected = min([distances.getDistance(position, food)
+                    for food in agent.getFoodPositions(successor)])
+
+            features = agent.getFeatures(state, action)
+            self.assertEqual(expected, features['distanceToFood'])
+
+            if (action == Directions.EAST):
+                self.assertEqual(1, successor.getScore())
+
+        # Looking at the eating move does not change the field.
+        self.assertEqual(0, agent.foodField.getDistance((6, 2)))
+        self.assertEqual(2, agent.foodField.getNumTargets())
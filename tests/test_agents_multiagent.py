@@ -0,0 +1,95 @@
+import unittest
+
+from pacai.agents.search.multiagent import TranspositionTable
+from pacai.bin import pacman
+from pacai.core import layout
+from pacai.student.multiagents import AlphaBetaAgent
+from pacai.student.multiagents import ExpectimaxAgent
+from pacai.student.multiagents import MinimaxAgent
+
+class TranspositionTableTest(unittest.TestCase):
+    def test_lru_replacement(self):
+        table = TranspositionTable(2)
+
+        table.put('a', 1, 0, 1.0)
+        table.put('b', 1, 0, 2.0)
+
+        # Touch 'a' so that 'b' is the least recently used.
+        self.assertEqual(1.0, table.get('a', 1, 0).value)
+
+        table.put('c', 1, 0, 3.0)
+        self.assertEqual(2, len(table))
+        self.assertIsNone(table.get('b', 1, 0))
+        self.assertIsNotNone(table.get('a', 1, 0))
+        self.assertIsNotNone(table.get('c', 1, 0))
+
+        # Depth and agent are part of the key.
+        self.assertIsNone(table.get('a', 2, 0))
+        self.assertIsNone(table.get('a', 1, 1))
+
+    def test_hash_collisions(self):
+        table = TranspositionTable()
+
+        first = _CollidingKey('first')
+        second = _CollidingKey('second')
+
+        table.put(first, 1, 0, 1.0)
+        table.putEvaluation(first, 1.0)
+
+        # The keys share a hash, but the verification hash tells them apart.
+        self.assertIsNone(table.get(second, 1, 0))
+        self.assertIsNone(table.getEvaluation(second))
+
+        self.assertEqual(1.0, table.get(_CollidingKey('first'), 1, 0).value)
+        self.assertEqual(1.0, table.getEvaluation(_CollidingKey('first')))
+
+    def test_bounds(self):
+        self.assertEqual(TranspositionTable.UPPER_BOUND, TranspositionTable.boundFor(1, 1, 5))
+        self.assertEqual(TranspositionTable.LOWER_BOUND, TranspositionTable.boundFor(5, 1, 5))
+        self.assertEqual(TranspositionTable.EXACT, TranspositionTable.boundFor(3, 1, 5))
+
+        table = TranspositionTable()
+
+        table.put('lower', 1, 0, 5.0, TranspositionTable.LOWER_BOUND)
+        self.assertTrue(table.get('lower', 1, 0).isCutoff(0.0, 4.0))
+        self.assertFalse(table.get('lower', 1, 0).isCutoff(0.0, 6.0))
+
+        table.put('upper', 1, 0, 5.0, TranspositionTable.UPPER_BOUND)
+        self.assertTrue(table.get('upper', 1, 0).isCutoff(6.0, 10.0))
+        self.assertFalse(table.get('upper', 1, 0).isCutoff(4.0, 10.0))
+
+        table.put('exact', 1, 0, 5.0)
+        self.assertTrue(table.get('exact', 1, 0).isCutoff(6.0, 10.0))
+
+    def test_agents_agree(self):
+        """
+        Minimax and alpha-beta must find the same value, with or without a warm table.
+        """
+
+        state = pacman.PacmanGameState(layout.getLayout('smallClassic'))
+
+        minimax = MinimaxAgent(0, depth = 2)
+        alphaBeta = AlphaBetaAgent(0, depth = 2)
+        expectimax = ExpectimaxAgent(0, depth = 2)
+
+        for _ in range(2):
+            for agent in [minimax, alphaBeta, expectimax]:
+                self.assertIn(agent.getAction(state), state.getLegalActions(0))
+
+        depth = 2
+        minimaxEntry = minimax.getTranspositionTable().get(state, depth, 0)
+        alphaBetaEntry = alphaBeta.getTranspositionTable().get(state, depth, 0)
+
+        self.assertEqual(TranspositionTable.EXACT, minimaxEntry.bound)
+        self.assertEqual(TranspositionTable.EXACT, alphaBetaEntry.bound)
+        self.assertEqual(minimaxEntry.value, alphaBetaEntry.value)
+
+class _CollidingKey(object):
+    def __init__(self, name):
+        self.name = name
+
+    def __hash__(self):
+        return 0
+
+    def __repr__(self):
+        return self.name
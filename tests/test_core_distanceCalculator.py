@@ -0,0 +1,331 @@
+import collections
+import os
+import random
+import tempfile
+import unittest
+
+from pacai.bin.pacman import PacmanGameState
+from pacai.core import distance
+from pacai.core import distanceCalculator
+from pacai.core import routing
+from pacai.core.actions import Actions
+from pacai.core.distance import manhattan
+from pacai.core.layout import Layout
+from pacai.core.layout import getLayout
+
+LAYOUTS = ['tinyMaze', 'smallClassic', 'tinyCapture']
+
+# Two rooms with no door between them.
+SPLIT_LAYOUT = [
+    '%%%%%%%',
+    '%P.%. %',
+    '%  %  %',
+    '%%%%%%%',
+]
+
+# A ring of corridor (no junctions) next to a room.
+RING_LAYOUT = [
+    '%%%%%%%%%',
+    '%   %P  %',
+    '% % %   %',
+    '%   %   %',
+    '%%%%%%%%%',
+]
+
+"""
+Test the maze distances against a simple search.
+"""
+class DistanceCalculatorTest(unittest.TestCase):
+    def _bfs(self, layout, source):
+        distances = {source: 0}
+        queue = collections.deque([source])
+
+        while (len(queue) > 0):
+            position = queue.popleft()
+            for neighbor in Actions.getLegalNeighbors(position, layout.walls):
+                if (neighbor not in distances):
+                    distances[neighbor] = distances[position] + 1
+                    queue.append(neighbor)
+
+        return distances
+
+    def test_distances(self):
+        for name in LAYOUTS:
+            layout = getLayout(name)
+            distancer = distanceCalculator.Distancer(layout)
+            distancer.getMazeDistances()
+
+            positions = layout.walls.asList(False)
+            for source in positions:
+                expected = self._bfs(layout, source)
+                for target in positions:
+                    self.assertEqual(expected[target], distancer.getDistance(source, target))
+
+                self.assertEqual([expected[target] for target in positions],
+                        list(distancer.getDistances(source, positions)))
+
+    def test_fractional(self):
+        layout = getLayout('smallClassic')
+        distancer = distanceCalculator.Distancer(layout)
+        distancer.getMazeDistances()
+
+        self.assertEqual(2.5, distancer.getDistance((1, 1), (1, 3.5)))
+        self.assertEqual(1.0, distancer.getDistance((1, 1.5), (1, 2.5)))
+
+    def test_not_ready(self):
+        distancer = distanceCalculator.Distancer(getLayout('smallClassic'))
+        self.assertEqual(manhattan((1, 1), (5, 7)), distancer.getDistance((1, 1), (5, 7)))
+
+    def test_errors(self):
+        distancer = distanceCalculator.Distancer(getLayout('smallClassic'))
+        distancer.getMazeDistances()
+
+        self.assertRaises(Exception, distancer.getDistance, (0, 0), (1, 1))
+        self.assertRaises(Exception, distancer.getDistances, (1, 1), [(0, 0)])
+
+    def test_unreachable(self):
+        layout = Layout(SPLIT_LAYOUT)
+        distancer = distanceCalculator.Distancer(layout)
+        distancer.getMazeDistances()
+
+        self.assertEqual(1, distancer.getDistance((1, 1), (2, 1)))
+        self.assertEqual(distanceCalculator.UNREACHABLE_DISTANCE,
+                distancer.getDistance((1, 1), (4, 1)))
+
+        matrix = distancer.getDistanceTable()
+        self.assertEqual([1, matrix.unreachable], list(distancer.getDistances((1, 1),
+                [(2, 1), (4, 1)])))
+
+    def test_fingerprint(self):
+        layout = getLayout('smallClassic')
+        noFood = Layout([row.replace('.', ' ') for row in layout.layoutText])
+        moreWalls = Layout([row.replace('.', '%') for row in layout.layoutText])
+
+        self.assertEqual(layout.getFingerprint(), noFood.getFingerprint())
+        self.assertNotEqual(layout.getFingerprint(), moreWalls.getFingerprint())
+
+    def test_disk_cache(self):
+        layout = getLayout('smallClassic')
+
+        with tempfile.TemporaryDirectory() as cacheDir:
+            computed = distanceCalculator.computeDistances(layout, cacheDir)
+            path = distanceCalculator.getCachePath(layout, cacheDir)
+            self.assertTrue(os.path.isfile(path))
+
+            loaded = distanceCalculator.loadDistances(getLayout('smallClassic'), cacheDir)
+            self.assertIsInstance(loaded.distances, memoryview)
+            self.assertEqual(list(computed.distances), list(loaded.distances))
+
+            positions = layout.walls.asList(False)
+            for target in positions[::10]:
+                self.assertEqual(computed.getDistance(positions[0], target),
+                        loaded.getDistance(positions[0], target))
+                self.assertEqual(list(computed.getDistances(target, positions)),
+                        list(loaded.getDistances(target, positions)))
+
+            # Broken files are ignored (and replaced when distances are computed again).
+            with open(path, 'wb') as file:
+                file.write(b'garbage')
+
+            self.assertIsNone(distanceCalculator.loadDistances(layout, cacheDir))
+            distanceCalculator.computeDistances(layout, cacheDir)
+            self.assertIsNotNone(distanceCalculator.loadDistances(layout, cacheDir))
+
+            # Release the mapped files before the directory is removed.
+            del loaded
+
+    def test_shared(self):
+        distanceCalculator.clearSharedDistances()
+
+        layout = getLayout('smallClassic')
+        first = distanceCalculator.Distancer(layout)
+        first.getMazeDistances()
+
+        # Another load of the same maze (e.g. the next game) gets the same matrix.
+        second = distanceCalculator.Distancer(getLayout('smallClassic'))
+        second.getMazeDistances()
+
+        self.assertIs(first.getDistanceTable(), second.getDistanceTable())
+        self.assertRaises(TypeError, first.getDistanceTable().distances.__setitem__, 0, 1)
+
+        other = distanceCalculator.Distancer(getLayout('mediumClassic'))
+        other.getMazeDistances()
+        self.assertIsNot(first.getDistanceTable(), other.getDistanceTable())
+
+        # Clearing a layout only drops the shared tables, not the layout's own derived data.
+        graph = layout.getMazeGraph()
+        junctions = distanceCalculator.getSharedJunctionDistances(layout)
+        nextHops = routing.getSharedNextHops(layout)
+
+        distanceCalculator.clearSharedDistances(layout)
+
+        self.assertIs(graph, layout.getMazeGraph())
+        self.assertIsNot(first.getDistanceTable(), distanceCalculator.getSharedDistances(layout))
+        self.assertIsNot(junctions, distanceCalculator.getSharedJunctionDistances(layout))
+        self.assertIsNot(nextHops, routing.getSharedNextHops(layout))
+
+        distanceCalculator.clearSharedDistances()
+
+    def test_lazy(self):
+        layout = getLayout('smallClassic')
+
+        full = distanceCalculator.Distancer(layout)
+        full.getMazeDistances()
+
+        lazy = distanceCalculator.Distancer(layout)
+        lazy.getLazyMazeDistances(maxRows = 2)
+        table = lazy.getDistanceTable()
+
+        positions = layout.walls.asList(False)
+        for source in positions[::7]:
+            for target in positions:
+                self.assertEqual(full.getDistance(source, target), lazy.getDistance(source, target))
+
+            self.assertEqual(list(full.getDistances(source, positions)),
+                    list(lazy.getDistances(source, positions)))
+
+            self.assertEqual(full.getDistance(source, (1, 1.5)), lazy.getDistance(source, (1, 1.5)))
+            self.assertLessEqual(table.getNumRows(), 2)
+
+        # Each source is computed once, and everything else is a hit.
+        self.assertEqual(len(positions[::7]), table.getMisses())
+        self.assertGreater(table.getHits(), 0)
+
+        # Distances are symmetric, so the reverse lookup uses the source's row.
+        table.clear()
+        misses = table.getMisses()
+
+        lazy.getDistance(positions[0], positions[1])
+        lazy.getDistance(positions[1], positions[0])
+        self.assertEqual(misses + 1, table.getMisses())
+        self.assertEqual(1, table.getStats()['rows'])
+
+    def test_incremental(self):
+        distanceCalculator.clearSharedDistances()
+
+        layout = getLayout('smallClassic')
+        positions = layout.walls.asList(False)
+        expected = distanceCalculator.DistanceMatrix(layout.getMazeGraph())
+
+        first = distanceCalculator.Distancer(layout)
+        second = distanceCalculator.Distancer(getLayout('smallClassic'))
+
+        # No time still computes one row.
+        self.assertFalse(first.computeMazeDistances(0))
+        self.assertFalse(first.isReadyForMazeDistance())
+
+        partial = first.getDistanceTable()
+        self.assertEqual(1, partial.getNumComputed())
+
+        # The first row is exact (both ways), the rest are Manhattan for now.
+        for target in positions:
+            self.assertEqual(expected.getDistance(positions[0], target),
+                    first.getDistance(positions[0], target))
+            self.assertEqual(expected.getDistance(positions[0], target),
+                    first.getDistance(target, positions[0]))
+            self.assertEqual(manhattan(positions[1], target),
+                    first.getDistance(positions[1], target))
+
+        self.assertEqual([manhattan(positions[1], target) for target in positions],
+                list(first.getDistances(positions[1], positions)))
+
+        # Everyone on the same maze works on the same rows.
+        self.assertFalse(second.computeMazeDistances(0))
+        self.assertIs(partial, second.getDistanceTable())
+        self.assertEqual(2, partial.getNumComputed())
+
+        while (not first.computeMazeDistances(0.001)):
+            pass
+
+        self.assertTrue(first.isReadyForMazeDistance())
+        self.assertTrue(second.computeMazeDistances(0))
+        self.assertIs(first.getDistanceTable(), second.getDistanceTable())
+        self.assertEqual(list(expected.distances), list(first.getDistanceTable().distances))
+
+        distanceCalculator.clearSharedDistances()
+
+    @unittest.skipIf(distanceCalculator.numpy is None, 'NumPy is not installed.')
+    def test_batched(self):
+        layout = getLayout('smallClassic')
+        positions = layout.walls.asList(False)
+        rng = random.Random(4)
+
+        # Include half steps between neighboring cells (like scared ghosts make).
+        halfSteps = []
+        for (x, y) in positions:
+            for (dx, dy) in [(0.5, 0), (0, 0.5)]:
+                if (not layout.isWall((int(x + dx * 2), int(y + dy * 2)))):
+                    halfSteps.append((x + dx, y + dy))
+
+        sources = [rng.choice(positions + halfSteps) for i in range(200)]
+        targets = [rng.choice(positions + halfSteps) for i in range(200)]
+
+        full = distanceCalculator.Distancer(layout)
+        full.getMazeDistances()
+
+        lazy = distanceCalculator.Distancer(layout)
+        lazy.getLazyMazeDistances()
+
+        partial = distanceCalculator.Distancer(layout)
+        partial._distances = distanceCalculator.PartialDistanceMatrix(layout.getMazeGraph())
+        partial._distances.compute(0)
+
+        notReady = distanceCalculator.Distancer(layout)
+
+        for distancer in [full, lazy, partial, notReady]:
+            expected = [distancer.getDistance(source, target)
+                    for (source, target) in zip(sources, targets)]
+            self.assertEqual(expected, list(distancer.getDistancesBetween(sources, targets)))
+
+            # A single source is paired with every target.
+            expected = [distancer.getDistance(sources[0], target) for target in targets]
+            self.assertEqual(expected, list(distancer.getDistancesBetween(sources[0], targets)))
+
+        self.assertRaises(Exception, full.getDistancesBetween, [(0, 0)], [(1, 1)])
+
+        split = distanceCalculator.Distancer(Layout(SPLIT_LAYOUT))
+        split.getMazeDistances()
+        expected = [distanceCalculator.UNREACHABLE_DISTANCE, distanceCalculator.DEFAULT_DISTANCE]
+        self.assertEqual(expected,
+                list(split.getDistancesBetween([(1, 1), (1, 1.5)], [(4, 1), (4, 1)])))
+
+    def test_junctions(self):
+        layouts = [getLayout(name) for name in LAYOUTS + ['bigMaze']]
+        layouts += [Layout(SPLIT_LAYOUT), Layout(RING_LAYOUT)]
+
+        for layout in layouts:
+            graph = layout.getMazeGraph()
+            expected = distanceCalculator.DistanceMatrix(graph)
+            table = distanceCalculator.JunctionDistanceTable(graph)
+
+            self.assertLess(table.getNumJunctions(), graph.getNumNodes())
+
+            for source in range(graph.getNumNodes()):
+                self.assertEqual(list(expected.getRow(source)), list(table.getRow(source)))
+
+        distancer = distanceCalculator.Distancer(getLayout('smallClassic'))
+        distancer.getJunctionMazeDistances()
+        self.assertEqual(2.5, distancer.getDistance((1, 1), (1, 3.5)))
+
+    def test_maze(self):
+        layout = Layout(SPLIT_LAYOUT)
+        state = PacmanGameState(layout)
+
+        self.assertEqual(1, distance.maze((1, 1), (2, 1), state))
+        self.assertEqual(2, distance.maze((1, 1), (2, 2), state))
+        self.assertRaises(ValueError, distance.maze, (3, 1), (1, 1), state)
+
+        fingerprint = layout.getFingerprint()
+        self.assertIn(fingerprint, distanceCalculator.distanceMap)
+
+        # Open a door between the rooms.
+        # The layout's own maze has to be rebuilt separately.
+        layout.walls[3][1] = False
+        distance.clearMazeDistances(state)
+        self.assertNotIn(fingerprint, distanceCalculator.distanceMap)
+        layout.clearDerivedData()
+
+        self.assertEqual(3, distance.maze((1, 1), (4, 1), state))
+
+        distance.clearMazeDistances()
+        self.assertEqual(0, len(distanceCalculator.distanceMap))
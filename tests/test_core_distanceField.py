@@ -0,0 +1,98 @@
+import random
+import unittest
+
+from pacai.core import distanceCalculator
+from pacai.core import distanceField
+from pacai.core.distanceField import DistanceField
+from pacai.core.layout import getLayout
+
+NUM_UPDATES = 100
+
+"""
+Test distance fields against the distances to every target.
+"""
+class DistanceFieldTest(unittest.TestCase):
+    def _checkField(self, field, matrix, positions, targets):
+        for position in positions:
+            distances = [matrix.getDistance(position, target) for target in targets]
+            expected = min(distances, default = distanceCalculator.UNREACHABLE_DISTANCE)
+
+            self.assertEqual(expected, field.getDistance(position))
+
+            nearest = field.getNearestTarget(position)
+            if (len(targets) == 0):
+                self.assertIsNone(nearest)
+            else:
+                self.assertIn(nearest, targets)
+                self.assertEqual(expected, matrix.getDistance(position, nearest))
+
+        self.assertEqual(len(targets), field.getNumTargets())
+
+    def test_updates(self):
+        for name in ['smallClassic', 'tinyCapture']:
+            layout = getLayout(name)
+            matrix = distanceCalculator.DistanceMatrix(layout.getMazeGraph())
+            positions = layout.walls.asList(False)
+            rng = random.Random(name)
+
+            targets = rng.sample(positions, 5)
+            field = DistanceField(layout, targets)
+            self._checkField(field, matrix, positions, targets)
+
+            for i in range(NUM_UPDATES):
+                choice = rng.random()
+
+                if (choice < 0.4 and len(targets) > 0):
+                    target = rng.choice(targets)
+                    targets.remove(target)
+                    field.removeTarget(target)
+                elif (choice < 0.7):
+                    target = rng.choice(positions)
+                    targets.append(target)
+                    field.addTarget(target)
+                elif (len(targets) > 0):
+                    index = rng.randrange(len(targets))
+                    target = rng.choice(positions)
+                    field.moveTarget(targets[index], target)
+                    targets[index] = target
+
+                self._checkField(field, matrix, positions, targets)
+
+            # Small and large changes to the whole set.
+            targets = targets[1:] + [rng.choice(positions)]
+            field.setTargets(targets)
+            self._checkField(field, matrix, positions, targets)
+
+            targets = rng.sample(positions, 10)
+            field.setTargets(targets)
+            self._checkField(field, matrix, positions, targets)
+
+    def test_positions(self):
+        layout = getLayout('smallClassic')
+        field = DistanceField(layout, [(1, 1)])
+
+        # Targets in between cells snap to the nearest cell, lookups add the extra distance.
+        self.assertEqual(0.5, field.getDistance((1, 1.5)))
+        field.moveTarget((1, 1), (1.4, 1))
+        self.assertEqual(0, field.getDistance((1, 1)))
+
+        self.assertRaises(ValueError, field.addTarget, (0, 0))
+        self.assertRaises(ValueError, field.removeTarget, (1, 2))
+
+        # Stacked targets need to all be removed.
+        field.addTarget((1, 1))
+        field.removeTarget((1, 1))
+        self.assertEqual(0, field.getDistance((1, 1)))
+        field.removeTarget((1, 1))
+        self.assertEqual(distanceCalculator.UNREACHABLE_DISTANCE, field.getDistance((1, 1)))
+
+    def test_shared(self):
+        layout = getLayout('smallClassic')
+
+        field = distanceField.getSharedField(layout, 'test')
+        self.assertIs(field, distanceField.getSharedField(getLayout('smallClassic'), 'test'))
+        self.assertIsNot(field, distanceField.getSharedField(layout, 'other'))
+
+        # Shared fields go away with the shared distances.
+        distanceCalculator.clearSharedDistances(layout)
+        self.assertIsNot(field, distanceField.getSharedField(layout, 'test'))
@@ -0,0 +1,132 @@
+import copy
+import random
+import unittest
+
+from pacai.bin.capture import CaptureGameState
+from pacai.bin.pacman import PacmanGameState
+from pacai.core.layout import getLayout
+
+NUM_MOVES = 300
+
+"""
+Test the bookkeeping that game states do incrementally as they change.
+"""
+class GameStateTest(unittest.TestCase):
+    def _checkRandomGame(self, state, seed):
+        rng = random.Random(seed)
+        agentIndex = 0
+
+        for i in range(NUM_MOVES):
+            if (state.isOver()):
+                break
+
+            action = rng.choice(state.getLegalActions(agentIndex))
+            parent = state
+            state = state.generateSuccessor(agentIndex, action)
+            agentIndex = (agentIndex + 1) % state.getNumAgents()
+
+            # The parent must not see any of the successor's changes.
+            self._checkState(parent)
+            self._checkState(state)
+
+    def _checkState(self, state):
+        self.assertEqual(state._computeHash(), state._hash)
+
+        food = state.getFood()
+        self.assertEqual(food.count(), state.getNumFood())
+        self.assertEqual(sorted(food.asList()), sorted(state.getFoodPositions()))
+
+        if (isinstance(state, CaptureGameState)):
+            self.assertEqual(state.getRedFood().count(), state.getNumRedFood())
+            self.assertEqual(state.getBlueFood().count(), state.getNumBlueFood())
+            self.assertEqual(state.getRedFood().asList(), sorted(state.getRedFoodPositions()))
+            self.assertEqual(state.getBlueFood().asList(), sorted(state.getBlueFoodPositions()))
+
+    def test_pacman_hash(self):
+        for seed in range(5):
+            self._checkRandomGame(PacmanGameState(getLayout('smallClassic')), seed)
+
+    def test_capture_hash(self):
+        for seed in range(5):
+            self._checkRandomGame(CaptureGameState(getLayout('tinyCapture'), NUM_MOVES), seed)
+
+    def test_equal_states_hash(self):
+        state = PacmanGameState(getLayout('testClassic'))
+
+        # Two different paths that end up in the same place facing the same way.
+        first = state
+        for action in ['North', 'East', 'South', 'West']:
+            first = first.generateSuccessor(0, action)
+
+        second = state
+        for action in ['North', 'South', 'East', 'West']:
+            second = second.generateSuccessor(0, action)
+
+        self.assertEqual(first, second)
+        self.assertEqual(hash(first), hash(second))
+        self.assertNotEqual(hash(state), hash(first))
+
+    def test_shared_agent_states(self):
+        state = PacmanGameState(getLayout('smallClassic'))
+        successor = state.generateSuccessor(0, state.getLegalActions(0)[0])
+
+        # Only the agent that moved gets its own copy.
+        self.assertIsNot(state.getAgentState(0), successor.getAgentState(0))
+        for index in range(1, state.getNumAgents()):
+            self.assertIs(state.getAgentState(index), successor.getAgentState(index))
+
+    def _checkApplyUndo(self, state, seed):
+        rng = random.Random(seed)
+        agentIndex = 0
+
+        start = state
+        state = copy.copy(start)
+        history = [start]
+
+        for i in range(NUM_MOVES):
+            if (state.isOver()):
+                break
+
+            action = rng.choice(state.getLegalActions(agentIndex))
+            successor = history[-1].generateSuccessor(agentIndex, action)
+
+            state.applyMove(agentIndex, action)
+            agentIndex = (agentIndex + 1) % state.getNumAgents()
+
+            self.assertEqual(successor, state)
+            self.assertEqual(hash(successor), hash(state))
+            self._checkState(state)
+
+            history.append(successor)
+
+        for expected in reversed(history[:-1]):
+            state.undoMove()
+
+            self.assertEqual(expected, state)
+            self.assertEqual(hash(expected), hash(state))
+            self._checkState(state)
+
+        # The starting state was never touched.
+        self._checkState(start)
+
+    def test_pacman_apply_undo(self):
+        for seed in range(5):
+            self._checkApplyUndo(PacmanGameState(getLayout('smallClassic')), seed)
+
+    def test_capture_apply_undo(self):
+        for seed in range(5):
+            self._checkApplyUndo(CaptureGameState(getLayout('tinyCapture'), NUM_MOVES), seed)
+
+    def test_generate_successors(self):
+        state = CaptureGameState(getLayout('tinyCapture'), NUM_MOVES)
+
+        for agentIndex in range(state.getNumAgents()):
+            successors = state.generateSuccessors(agentIndex)
+            self.assertEqual(state.getLegalActions(agentIndex), [pair[0] for pair in successors])
+
+            for (action, successor) in successors:
+                self.assertEqual(state.generateSuccessor(agentIndex, action), successor)
+                self._checkState(successor)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+from pacai.core.grid import BitGrid
+from pacai.core.grid import Grid
+
+"""
+Test that the packed grid behaves like the list-backed grid.
+"""
+class BitGridTest(unittest.TestCase):
+    def test_matches_grid(self):
+        width, height = 7, 5
+        cells = [(0, 0), (1, 4), (3, 2), (6, 4), (6, 0)]
+
+        grid = Grid(width, height)
+        bitGrid = BitGrid(width, height)
+
+        for (x, y) in cells:
+            grid[x][y] = True
+            bitGrid[x][y] = True
+
+        self.assertEqual(grid.asList(), bitGrid.asList())
+        self.assertEqual(grid.asList(False), bitGrid.asList(False))
+        self.assertEqual(grid.count(), bitGrid.count())
+        self.assertEqual(grid.count(False), bitGrid.count(False))
+        self.assertEqual(str(grid), str(bitGrid))
+        self.assertEqual(bitGrid, grid)
+
+        for x in range(width):
+            for y in range(height):
+                self.assertEqual(grid[x][y], bitGrid[x][y])
+                self.assertEqual(grid[x][y], bitGrid.get(x, y))
+
+    def test_copy(self):
+        grid = BitGrid(4, 4, initialValue = True)
+        other = grid.copy()
+
+        self.assertEqual(grid, other)
+        self.assertEqual(hash(grid), hash(other))
+
+        other[2][3] = False
+
+        self.assertTrue(grid[2][3])
+        self.assertFalse(other[2][3])
+        self.assertNotEqual(grid, other)
+        self.assertEqual(15, other.count())
+
+    def test_bounds(self):
+        grid = BitGrid(3, 2)
+
+        grid[-1][-1] = True
+        self.assertTrue(grid[2][1])
+
+        with self.assertRaises(IndexError):
+            grid[3][0]
+
+        with self.assertRaises(IndexError):
+            grid[0][2] = True
+
+if __name__ == '__main__':
+    unittest.main()
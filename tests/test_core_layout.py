@@ -0,0 +1,64 @@
+import unittest
+
+from pacai.core.actions import Actions
+from pacai.core.directions import Directions
+from pacai.core.layout import getLayout
+
+LAYOUTS = ['mediumClassic', 'tinyCapture', 'trickySearch']
+DIRECTIONS = Directions.CARDINAL + [Directions.STOP]
+
+"""
+Test the tables that layouts precompute.
+"""
+class LayoutTest(unittest.TestCase):
+    def test_legal_actions(self):
+        for name in LAYOUTS:
+            layout = getLayout(name)
+
+            for (x, y) in layout.walls.asList(False):
+                for direction in DIRECTIONS:
+                    expected = Actions.getPossibleActions((x, y), direction, layout.walls)
+                    self.assertEqual(expected, layout.getLegalActions((x, y), direction))
+
+    def test_legal_ghost_actions(self):
+        for name in LAYOUTS:
+            layout = getLayout(name)
+
+            for (x, y) in layout.walls.asList(False):
+                for direction in DIRECTIONS:
+                    expected = Actions.getPossibleActions((x, y), direction, layout.walls)
+                    expected = [action for action in expected if action != Directions.STOP]
+
+                    reverse = Actions.reverseDirection(direction)
+                    if (reverse in expected and len(expected) > 1):
+                        expected.remove(reverse)
+
+                    self.assertEqual(expected, layout.getLegalGhostActions((x, y), direction))
+
+    def test_between_cells(self):
+        layout = getLayout('mediumClassic')
+
+        self.assertEqual([Directions.EAST], layout.getLegalActions((1.5, 1), Directions.EAST))
+        self.assertEqual([Directions.EAST], layout.getLegalGhostActions((1.5, 1), Directions.EAST))
+
+    def test_maze_graph(self):
+        for name in LAYOUTS:
+            layout = getLayout(name)
+            graph = layout.getMazeGraph()
+
+            self.assertEqual(layout.walls.count(False), graph.getNumNodes())
+
+            for nodeId in range(graph.getNumNodes()):
+                position = graph.getPosition(nodeId)
+                self.assertEqual(nodeId, graph.getId(position))
+
+                neighbors = [graph.getPosition(other) for other in graph.getNeighbors(nodeId)]
+                expected = [other for other in Actions.getLegalNeighbors(position, layout.walls)
+                        if other != position]
+                self.assertEqual(expected, neighbors)
+
+                for (action, neighbor) in zip(graph.getActions(nodeId), neighbors):
+                    self.assertEqual(neighbor, Actions.getSuccessor(position, action))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+
+from pacai.agents.ghost.maze import MazeGhost
+from pacai.bin.pacman import PacmanGameState
+from pacai.core import distanceCalculator
+from pacai.core import routing
+from pacai.core.actions import Actions
+from pacai.core.directions import Directions
+from pacai.core.layout import Layout
+from pacai.core.layout import getLayout
+
+# Two rooms with no door between them.
+SPLIT_LAYOUT = [
+    '%%%%%%%',
+    '%P.%. %',
+    '%  %  %',
+    '%%%%%%%',
+]
+
+"""
+Test that following next hops walks shortest paths.
+"""
+class NextHopTableTest(unittest.TestCase):
+    def test_hops(self):
+        for name in ['tinyMaze', 'smallClassic', 'tinyCapture']:
+            layout = getLayout(name)
+            matrix = distanceCalculator.getSharedDistances(layout)
+            table = routing.NextHopTable(layout)
+            positions = layout.walls.asList(False)
+
+            for source in positions:
+                for target in positions:
+                    hop = table.nextHop(source, target)
+
+                    if (source == target):
+                        self.assertEqual(Directions.STOP, hop)
+                        continue
+
+                    nextPosition = Actions.getSuccessor(source, hop)
+                    self.assertEqual(matrix.getDistance(source, target) - 1,
+                            matrix.getDistance(nextPosition, target))
+
+    def test_unreachable(self):
+        table = routing.NextHopTable(Layout(SPLIT_LAYOUT))
+
+        self.assertEqual(Directions.EAST, table.nextHop((1, 1), (2, 1)))
+        self.assertIsNone(table.nextHop((1, 1), (4, 1)))
+        self.assertRaises(ValueError, table.nextHop, (0, 0), (1, 1))
+
+    def test_shared(self):
+        layout = getLayout('smallClassic')
+        table = routing.getSharedNextHops(layout)
+
+        self.assertIs(table, routing.getSharedNextHops(getLayout('smallClassic')))
+
+    def test_maze_ghost(self):
+        state = PacmanGameState(getLayout('smallClassic'))
+        ghost = MazeGhost(1, prob_attack = 1.0)
+
+        position = state.getGhostPosition(1)
+        distribution = ghost.getDistribution(state)
+        action = max(distribution, key = distribution.get)
+
+        matrix = distanceCalculator.getSharedDistances(state.getInitialLayout())
+        self.assertEqual(1.0, distribution[action])
+        self.assertEqual(matrix.getDistance(position, state.getPacmanPosition()) - 1,
+                matrix.getDistance(Actions.getSuccessor(position, action),
+                        state.getPacmanPosition()))
@@ -0,0 +1,332 @@
+import gc
+import random
+import unittest
+
+from pacai.bin.pacman import PacmanGameState
+from pacai.core import distanceCalculator
+from pacai.core.layout import getLayout
+from pacai.core.search import engine
+from pacai.core.search import heuristic
+from pacai.core.search.food import FoodSearchProblem
+from pacai.core.search.position import PositionSearchProblem
+from pacai.core.search.problem import SearchProblem
+
+NUM_PAIRS = 25
+
+# A weighted graph where the path with the fewest steps is not the cheapest one.
+# Each node maps to its (successor, cost) edges.
+GRAPH = {
+    'S': [('A', 1), ('G', 10)],
+    'A': [('B', 1), ('S', 1)],
+    'B': [('C', 1), ('G', 5)],
+    'C': [('G', 1)],
+    'G': [],
+    'X': [('G', 1)],
+}
+
+class GraphSearchProblem(SearchProblem):
+    def __init__(self, start, goal):
+        super().__init__()
+
+        self.start = start
+        self.goal = goal
+
+    def actionsCost(self, actions):
+        cost = 0
+        state = self.start
+
+        for action in actions:
+            cost += dict(GRAPH[state])[action]
+            state = action
+
+        return cost
+
+    def isGoal(self, state):
+        return state == self.goal
+
+    def startingState(self):
+        return self.start
+
+    def successorStates(self, state):
+        self._numExpanded += 1
+        return [(successor, successor, cost) for (successor, cost) in GRAPH[state]]
+
+class MemoryCheckingFoodProblem(FoodSearchProblem):
+    """
+    A food problem that periodically counts the nodes (and the leaves heap)
+    that a `memoryBoundedAStarSearch` is holding on to.
+    """
+
+    SAMPLE_INTERVAL = 2000
+
+    def __init__(self, startingGameState):
+        super().__init__(startingGameState)
+
+        # (stored nodes, all live nodes, heap entries)
+        self.samples = []
+
+    def successorStates(self, state):
+        if (self._numExpanded % self.SAMPLE_INTERVAL == 0):
+            self._sample()
+
+        return super().successorStates(state)
+
+    def _sample(self):
+        nodes = []
+        heapSize = 0
+
+        for obj in gc.get_objects():
+            if (isinstance(obj, engine._MemoryNode)):
+                nodes.append(obj)
+            elif (isinstance(obj, list) and len(obj) > 0 and isinstance(obj[0], tuple)
+                    and len(obj[0]) == 4 and isinstance(obj[0][3], engine._MemoryNode)):
+                heapSize = max(heapSize, len(obj))
+
+        numStored = len([node for node in nodes if node.isStored])
+        self.samples.append((numStored, len(nodes), heapSize))
+
+"""
+Test the search engine's paths against known path costs.
+"""
+class SearchEngineTest(unittest.TestCase):
+    def test_graph(self):
+        problem = GraphSearchProblem('S', 'G')
+
+        self.assertEqual(['G'], engine.breadthFirstSearch(problem))
+        self.assertEqual(['A', 'B', 'C', 'G'], engine.uniformCostSearch(problem))
+        self.assertEqual(['A', 'B', 'C', 'G'], engine.aStarSearch(problem))
+
+        path = engine.depthFirstSearch(problem)
+        self.assertEqual('G', path[-1])
+
+    def test_start_is_goal(self):
+        problem = GraphSearchProblem('G', 'G')
+
+        for search in [engine.breadthFirstSearch, engine.depthFirstSearch,
+                engine.uniformCostSearch, engine.aStarSearch]:
+            self.assertEqual([], search(problem))
+
+    def test_no_path(self):
+        problem = GraphSearchProblem('G', 'X')
+
+        for search in [engine.breadthFirstSearch, engine.depthFirstSearch,
+                engine.uniformCostSearch, engine.aStarSearch]:
+            self.assertEqual([], search(problem))
+
+    def test_maze(self):
+        for name in ['mediumMaze', 'bigMaze']:
+            state = PacmanGameState(getLayout(name))
+            start = state.getPacmanPosition()
+            goal = (1, 1)
+
+            expected = distanceCalculator.getSharedDistances(state.getInitialLayout()).getDistance(
+                    start, goal)
+
+            for (search, kwargs) in [
+                    (engine.breadthFirstSearch, {}),
+                    (engine.uniformCostSearch, {}),
+                    (engine.aStarSearch, {'heuristic': heuristic.manhattan}),
+                    ]:
+                problem = PositionSearchProblem(state, goal = goal, start = start)
+                path = search(problem, **kwargs)
+
+                self.assertEqual(expected, len(path))
+                self.assertEqual(expected, problem.actionsCost(path))
+
+            problem = PositionSearchProblem(state, goal = goal, start = start)
+            path = engine.depthFirstSearch(problem)
+            self.assertGreaterEqual(problem.actionsCost(path), expected)
+
+    def test_bidirectional(self):
+        # Moving into a cell costs more the further east it is.
+        costFn = lambda position: position[0]
+
+        for name in ['mediumMaze', 'bigMaze', 'openMaze']:
+            state = PacmanGameState(getLayout(name))
+            start = state.getPacmanPosition()
+            goal = (1, 1)
+
+            problem = PositionSearchProblem(state, goal = goal, start = start)
+            expected = len(engine.breadthFirstSearch(problem))
+
+            problem = PositionSearchProblem(state, goal = goal, start = start)
+            path = engine.bidirectionalBreadthFirstSearch(problem)
+            self.assertEqual(expected, problem.actionsCost(path))
+
+            problem = PositionSearchProblem(state, costFn = costFn, goal = goal, start = start)
+            expected = problem.actionsCost(engine.uniformCostSearch(problem))
+
+            problem = PositionSearchProblem(state, costFn = costFn, goal = goal, start = start)
+            path = engine.bidirectionalUniformCostSearch(problem)
+            self.assertEqual(expected, problem.actionsCost(path))
+
+            # The start is the goal.
+            problem = PositionSearchProblem(state, goal = start, start = start)
+            self.assertEqual([], engine.bidirectionalBreadthFirstSearch(problem))
+            self.assertEqual([], engine.bidirectionalUniformCostSearch(problem))
+
+    def test_bidirectional_fallback(self):
+        # Without a known goal, the ordinary searches are used.
+        problem = GraphSearchProblem('S', 'G')
+
+        self.assertEqual(['G'], engine.bidirectionalBreadthFirstSearch(problem))
+        self.assertEqual(['A', 'B', 'C', 'G'], engine.bidirectionalUniformCostSearch(problem))
+
+        class AnyCornerProblem(PositionSearchProblem):
+            def isGoal(self, state):
+                return state in [(1, 1), (1, 5)]
+
+        problem = AnyCornerProblem(PacmanGameState(getLayout('tinyMaze')))
+        self.assertIsNone(problem.getGoalState())
+        self.assertEqual(engine.breadthFirstSearch(problem),
+                engine.bidirectionalBreadthFirstSearch(problem))
+
+    def test_memory_bounded(self):
+        problem = GraphSearchProblem('S', 'G')
+        self.assertEqual(['A', 'B', 'C', 'G'], engine.iterativeDeepeningAStarSearch(problem))
+        self.assertEqual(['A', 'B', 'C', 'G'], engine.memoryBoundedAStarSearch(problem))
+        self.assertEqual(['A', 'B', 'C', 'G'],
+                engine.memoryBoundedAStarSearch(problem, maxNodes = 5))
+
+        # Not enough memory for the cheapest path, so settle for the best one that fits.
+        self.assertEqual(['G'], engine.memoryBoundedAStarSearch(problem, maxNodes = 3))
+
+        problem = GraphSearchProblem('G', 'X')
+        self.assertEqual([], engine.iterativeDeepeningAStarSearch(problem))
+        self.assertEqual([], engine.memoryBoundedAStarSearch(problem))
+
+    def test_memory_bounded_food(self):
+        state = PacmanGameState(getLayout('tinySearch'))
+
+        problem = FoodSearchProblem(state)
+        expected = problem.actionsCost(engine.aStarSearch(problem, heuristic = heuristic.numFood))
+
+        for maxNodes in [1000, 5000]:
+            problem = FoodSearchProblem(state)
+            path = engine.memoryBoundedAStarSearch(problem, heuristic = heuristic.numFood,
+                    maxNodes = maxNodes)
+            self.assertEqual(expected, problem.actionsCost(path))
+
+        state = PacmanGameState(getLayout('testSearch'))
+
+        problem = FoodSearchProblem(state)
+        expected = problem.actionsCost(engine.aStarSearch(problem, heuristic = heuristic.numFood))
+
+        problem = FoodSearchProblem(state)
+        path = engine.iterativeDeepeningAStarSearch(problem, heuristic = heuristic.numFood)
+        self.assertEqual(expected, problem.actionsCost(path))
+
+    def test_memory_bounded_small(self):
+        """
+        Small budgets still find the cheapest path,
+        and the memory held by the search stays within a small multiple of the budget.
+        """
+
+        state = PacmanGameState(getLayout('tinySearch'))
+
+        problem = FoodSearchProblem(state)
+        expected = problem.actionsCost(engine.aStarSearch(problem, heuristic = heuristic.numFood))
+
+        maxNodes = 300
+        problem = MemoryCheckingFoodProblem(state)
+        path = engine.memoryBoundedAStarSearch(problem, heuristic = heuristic.numFood,
+                maxNodes = maxNodes)
+
+        self.assertEqual(expected, problem.actionsCost(path))
+        self.assertGreater(len(problem.samples), 0)
+
+        for (numStored, numNodes, heapSize) in problem.samples:
+            self.assertLessEqual(numStored, maxNodes + 1)
+            self.assertLessEqual(numNodes, 3 * maxNodes)
+            self.assertLessEqual(heapSize, 3 * maxNodes)
+
+    def test_food_mst(self):
+        for name in ['testSearch', 'tinySearch']:
+            state = PacmanGameState(getLayout(name))
+
+            problem = FoodSearchProblem(state)
+            expected = problem.actionsCost(engine.breadthFirstSearch(problem))
+
+            problem = FoodSearchProblem(state)
+            path = engine.aStarSearch(problem, heuristic = heuristic.foodMST)
+            self.assertEqual(expected, problem.actionsCost(path))
+
+            # Walk the optimal path, checking consistency against every successor along the way.
+            searchState = problem.startingState()
+            for action in path:
+                value = heuristic.foodMST(searchState, problem)
+                self.assertLessEqual(value, expected)
+
+                for (successor, successorAction, stepCost) in problem.successorStates(searchState):
+                    self.assertLessEqual(value, stepCost + heuristic.foodMST(successor, problem))
+
+                    if (successorAction == action):
+                        nextState = successor
+
+                searchState = nextState
+                expected -= 1
+
+            self.assertEqual(0, heuristic.foodMST(searchState, problem))
+
+    def test_food_mst_cache(self):
+        state = PacmanGameState(getLayout('tinySearch'))
+        problem = FoodSearchProblem(state)
+
+        cacheSize = heuristic.MST_CACHE_SIZE
+        heuristic.MST_CACHE_SIZE = 10
+
+        try:
+            engine.aStarSearch(problem, heuristic = heuristic.foodMST)
+        finally:
+            heuristic.MST_CACHE_SIZE = cacheSize
+
+        self.assertEqual(10, len(problem.heuristicInfo['mstWeights']))
+
+    def test_jump_point(self):
+        for name in ['openMaze', 'openSearch', 'bigSafeSearch', 'mediumMaze']:
+            layout = getLayout(name)
+            state = PacmanGameState(layout)
+            positions = layout.walls.asList(False)
+            rng = random.Random(name)
+
+            for i in range(NUM_PAIRS):
+                start = rng.choice(positions)
+                goal = rng.choice(positions)
+
+                problem = PositionSearchProblem(state, goal = goal, start = start)
+                expected = len(engine.breadthFirstSearch(problem))
+
+                problem = PositionSearchProblem(state, goal = goal, start = start)
+                path = engine.jumpPointSearch(problem, heuristic = heuristic.manhattan)
+
+                self.assertEqual(expected, len(path))
+                self.assertEqual(expected, problem.actionsCost(path))
+
+                if (len(path) > 0):
+                    self.assertIn(start, problem.getVisitHistory())
+                    self.assertIn(goal, problem.getVisitHistory())
+
+    def test_jump_point_fallback(self):
+        # Without unit costs, jump point search is just A*.
+        state = PacmanGameState(getLayout('mediumMaze'))
+        costFn = lambda position: position[0]
+
+        problem = PositionSearchProblem(state, costFn = costFn)
+        expected = problem.actionsCost(engine.aStarSearch(problem))
+
+        problem = PositionSearchProblem(state, costFn = costFn)
+        self.assertEqual(expected, problem.actionsCost(engine.jumpPointSearch(problem)))
+
+        problem = GraphSearchProblem('S', 'G')
+        self.assertEqual(['A', 'B', 'C', 'G'], engine.jumpPointSearch(problem))
+
+    def test_tree(self):
+        tree = engine.SearchTree()
+
+        root = tree.addNode('S')
+        child = tree.addNode('A', root, 'a', 1)
+        grandchild = tree.addNode('B', child, 'b', 2)
+
+        self.assertEqual(3, len(tree))
+        self.assertEqual([], tree.getPath(root))
+        self.assertEqual(['a', 'b'], tree.getPath(grandchild))
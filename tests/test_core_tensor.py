@@ -0,0 +1,97 @@
+import random
+import unittest
+
+from pacai.bin.capture import CaptureGameState
+from pacai.bin.pacman import PacmanGameState
+from pacai.core import tensor
+from pacai.core.layout import getLayout
+
+NUM_MOVES = 50
+
+"""
+Test the NumPy encodings of game states against the accessors.
+"""
+@unittest.skipIf(not tensor.hasNumpy(), 'NumPy is not installed.')
+class TensorTest(unittest.TestCase):
+    def _checkState(self, state):
+        planes = state.getPlanes()
+        walls = state.getWalls()
+        food = state.getFood()
+
+        for x in range(walls.getWidth()):
+            for y in range(walls.getHeight()):
+                self.assertEqual(walls[x][y], bool(planes[tensor.PLANE_WALLS][x][y]))
+                self.assertEqual(food[x][y], bool(planes[tensor.PLANE_FOOD][x][y]))
+                self.assertEqual(state.hasCapsule(x, y),
+                        bool(planes[tensor.PLANE_CAPSULES][x][y]))
+
+        for agent in state.getAgentStates():
+            x, y = agent.getNearestPosition()
+            if (agent.isPacman()):
+                self.assertEqual(1, planes[tensor.PLANE_PACMAN][x][y])
+            elif (agent.isScared()):
+                self.assertEqual(1, planes[tensor.PLANE_SCARED_GHOSTS][x][y])
+            else:
+                self.assertEqual(1, planes[tensor.PLANE_GHOSTS][x][y])
+
+        stacked = state.getTensor()
+        names = state.getPlaneNames()
+        self.assertEqual((len(names), walls.getWidth(), walls.getHeight()), stacked.shape)
+        for i in range(len(names)):
+            self.assertTrue((stacked[i] == planes[names[i]]).all())
+
+    def _checkRandomGame(self, state, seed):
+        rng = random.Random(seed)
+        agentIndex = 0
+
+        for i in range(NUM_MOVES):
+            if (state.isOver()):
+                break
+
+            action = rng.choice(state.getLegalActions(agentIndex))
+            parentTensor = state.getTensor().copy()
+
+            state.applyMove(agentIndex, action)
+            self._checkState(state)
+
+            # Undoing must bring back the parent's (cached) encoding.
+            state.undoMove()
+            self.assertTrue((state.getTensor() == parentTensor).all())
+
+            state = state.generateSuccessor(agentIndex, action)
+            self._checkState(state)
+
+            agentIndex = (agentIndex + 1) % state.getNumAgents()
+
+    def test_pacman(self):
+        state = PacmanGameState(getLayout('smallClassic'))
+        self._checkState(state)
+        self._checkRandomGame(state, 0)
+
+    def test_capture(self):
+        layout = getLayout('tinyCapture')
+        state = CaptureGameState(layout, 1000)
+        self._checkState(state)
+        self._checkRandomGame(state, 0)
+
+        planes = state.getPlanes()
+        for x in range(layout.getWidth()):
+            for y in range(layout.getHeight()):
+                self.assertEqual(state.isOnRedSide((x, y)),
+                        bool(planes[tensor.PLANE_RED_SIDE][x][y]))
+
+        for index in range(state.getNumAgents()):
+            x, y = state.getAgentState(index).getNearestPosition()
+            if (state.isOnRedTeam(index)):
+                self.assertEqual(1, planes[tensor.PLANE_RED_TEAM][x][y])
+            else:
+                self.assertEqual(1, planes[tensor.PLANE_BLUE_TEAM][x][y])
+
+    def test_shared_walls(self):
+        layout = getLayout('smallClassic')
+        state = PacmanGameState(layout)
+        successor = state.generateSuccessor(0, state.getLegalActions(0)[0])
+
+        self.assertIs(layout.getWallPlane(), state.getPlanes()[tensor.PLANE_WALLS])
+        self.assertIs(layout.getWallPlane(), successor.getPlanes()[tensor.PLANE_WALLS])
+        self.assertFalse(state.getTensor().flags.writeable)
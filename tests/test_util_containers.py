@@ -1,3 +1,4 @@
+import random
 import unittest
 
 from pacai.util import priorityQueue
@@ -52,5 +53,84 @@ class UtilContainersTest(unittest.TestCase):
         for val, pri in reversed(val_list):
             self.assertEqual(val, testPriorityQueue.pop())
 
+    def test_priority_queue_ties(self):
+        testPriorityQueue = priorityQueue.PriorityQueue()
+
+        # Items that can not be compared come out in the order they went in.
+        items = [{'value': x} for x in range(10)]
+        for item in items:
+            testPriorityQueue.push(item, 0)
+
+        for item in items:
+            self.assertIs(item, testPriorityQueue.pop())
+
+    def test_indexed_priority_queue(self):
+        for testQueue in [priorityQueue.IndexedPriorityQueue(),
+                priorityQueue.IndexedPriorityQueue(maxItems = 100)]:
+            self.assertTrue(testQueue.isEmpty())
+
+            rng = random.Random(0)
+            priorities = {}
+
+            for i in range(1000):
+                item = rng.randrange(100)
+                priority = rng.randrange(1000)
+
+                if (item not in priorities):
+                    self.assertFalse(item in testQueue)
+                    testQueue.push(item, priority)
+                    priorities[item] = priority
+                elif (priority < priorities[item]):
+                    self.assertTrue(testQueue.update(item, priority))
+                    priorities[item] = priority
+                else:
+                    self.assertFalse(testQueue.update(item, priority))
+
+                self.assertTrue(testQueue.contains(item))
+                self.assertEqual(priorities[item], testQueue.getPriority(item))
+                self.assertRaises(ValueError, testQueue.push, item, priority)
+
+                # Pop now and then.
+                if (rng.random() < 0.3):
+                    item = testQueue.pop()
+                    self.assertEqual(min(priorities.values()), priorities.pop(item))
+                    self.assertFalse(testQueue.contains(item))
+
+                self.assertEqual(len(priorities), len(testQueue))
+
+            while (not testQueue.isEmpty()):
+                item = testQueue.pop()
+                self.assertEqual(min(priorities.values()), priorities.pop(item))
+
+            self.assertEqual(0, len(priorities))
+
+    def test_indexed_priority_queue_remove(self):
+        testQueue = priorityQueue.IndexedPriorityQueue(maxItems = 20)
+        for item in range(20):
+            testQueue.push(item, (item * 7) % 20)
+
+        for item in range(0, 20, 3):
+            testQueue.remove(item)
+            self.assertFalse(testQueue.contains(item))
+
+        self.assertRaises(KeyError, testQueue.remove, 0)
+
+        expected = sorted([item for item in range(20) if (item % 3 != 0)],
+                key = lambda item: (item * 7) % 20)
+        self.assertEqual(expected, [testQueue.pop() for i in range(len(expected))])
+
+    def test_indexed_priority_queue_ties(self):
+        testQueue = priorityQueue.IndexedPriorityQueue()
+
+        for item in ['c', 'a', 'b']:
+            testQueue.push(item, 1)
+
+        # An updated item goes behind the items it now ties with.
+        testQueue.push('d', 2)
+        testQueue.update('d', 1)
+
+        self.assertEqual(['c', 'a', 'b', 'd'], [testQueue.pop() for i in range(4)])
+        self.assertRaises(KeyError, testQueue.getPriority, 'a')
+
 if __name__ == '__main__':
     unittest.main()